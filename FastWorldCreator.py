@@ -1,6 +1,6 @@
 import logging
-from functools import partial
-from typing import Generator, Union
+from functools import lru_cache, partial
+from typing import Callable, List, Tuple
 
 from fast_world_creator.utils import common_utils as cu
 
@@ -15,7 +15,9 @@ logging.info("Initializing")
 import PySimpleGUI as sg
 
 from fast_world_creator import core
-from fast_world_creator.ui import window
+from fast_world_creator.datapacks.base_datapack import Datapack
+from fast_world_creator.datapacks.jar_datapack import JarDatapack
+from fast_world_creator.ui import window, worker
 from fast_world_creator.utils import minecraft_utils as mu
 from fast_world_creator.utils.level_dat_utils import get_default_gamerules
 
@@ -26,40 +28,46 @@ sg.SetOptions(
     input_text_color="#000000"
 )
 
-available_datapacks = cu.get_available_datapacks()
-available_datapacks.sort(key=lambda x: x.name)
 difficulties = [d.name.title() for d in mu.Difficulties]
 game_modes = [g.name.title() for g in mu.GameModes]
-biomes = mu.get_mc_definitions("biomes")
-gamerules = get_default_gamerules()
-ui_defaults = cu.get_default_ui_values(config.get("UI", "template_file"))
+
+
+@lru_cache(maxsize=1)
+def get_available_datapacks() -> List[Datapack]:
+    """ Get the datapacks that can be added to a world, sorted by name.
+
+    The assets/datapacks folder is only scanned the first time they are used.
+    """
+    return sorted(cu.get_available_datapacks(), key=lambda x: x.name)
+
+
+def get_biomes() -> List[str]:
+    """ Get the biomes that can be selected, read once from the assets. """
+    return mu.get_mc_definitions("biomes")
+
+
+@lru_cache(maxsize=1)
+def get_gamerules() -> dict:
+    """ Get the gamerules shown in the window and their default values. """
+    return get_default_gamerules()
 
 
 def parse_generator_options(values: dict) -> dict:
     """ Extract terrain generator options into a semi-parsed dictionary.
 
     :param values: The values generated from the PySimpleGUI window event."""
-
-    def parse_flat_layers():
-        layers = []
-        for layer in values.get("flat_layers").split(","):
-            if "*" in layer:
-                layers.append(layer.split("*"))
-            else:
-                layers.append((1, layer))
-        return layers
-
     logging.info("Parsing terrain generation options")
     return {
         "buffet_biome_type": values.get("buffet_biome_type").lower(),
-        "buffet_biomes": [b for b in biomes if values[f"buffet_biomes_{b}"]],
+        "buffet_biomes": [
+            b for b in get_biomes() if values[f"buffet_biomes_{b}"]],
         "buffet_size": int(values.get("buffet_size")),
         "buffet_block": values.get('buffet_block'),
         "buffet_fluid": "water" if values.get('buffet_fluid_water') else "lava",
         "buffet_chunk_type": values.get("buffet_chunk_type").lower(),
 
         "flat_biome": values.get('flat_biome'),
-        "flat_layers": parse_flat_layers(),
+        "flat_layers": mu.parse_flat_layers(values.get("flat_layers")),
         "flat_structures": dict.fromkeys(
             values.get("flat_structures").split(","))
     }
@@ -79,22 +87,26 @@ def parse_border_options(values: dict) -> dict:
     return border_opts
 
 
-def create(values: dict) -> Generator[Union[str, int], None, None]:
-    """ Start the creation of the Minecraft world and update the progress bar.
+def create(values: dict) -> Tuple[str, Callable, int]:
+    """ Prepare the creation of the Minecraft world for the creation worker.
 
-    :param values: The values generated from the PySimpleGUI window event."""
+    :param values: The values generated from the PySimpleGUI window event.
+    :return: The world name, the core execution and the amount of stages it
+        reports.
+    """
     logging.info("Preparing core execution")
     updated_gamerules = dict()
-    for gr in gamerules:
+    for gr in get_gamerules():
         # Gamerules always stored as strings in level.dat
         updated_gamerules[gr] = str(values.get(f"gamerules_{gr}")).lower()
-    parse_border_options(values)
-    enabled_dp = [dp for dp in available_datapacks if values.get(dp.name, None)]
+    enabled_dp = [
+        dp for dp in get_available_datapacks() if values.get(dp.name, None)]
+    world_name = values.get("main_name").replace(" ", "_")
 
     execution = partial(
         core.run,
         version=values.get("main_release"),
-        world_name=values.get("main_name").replace(" ", "_"),
+        world_name=world_name,
         seed=values.get("main_seed"),
         difficulty=difficulties.index(values.get("main_difficulty")),
         datapacks=enabled_dp,
@@ -106,36 +118,55 @@ def create(values: dict) -> Generator[Union[str, int], None, None]:
         thundering=values.get("main_thunder"),
         border_settings=parse_border_options(values)
     )
-    yield "start"
-    # World folder, datapacks and level.dat
-    total_yields = len(enabled_dp) + 2
-    yield_counter = 0
-    for _ in execution():
-        yield_counter += 1
-        yield yield_counter / total_yields * 100
-    yield 100
-    yield "done"
+    # World folder, jar pipeline (if there are randomizers), create and store
+    # of every datapack, level.dat encode and save. A datapack that fails to
+    # be created skips its store stage.
+    total_stages = 2 * len(enabled_dp) + 3 + any(
+        isinstance(d, JarDatapack) for d in enabled_dp)
+    return world_name or "<random name>", execution, total_stages
+
+
+def update_progress(events: list) -> None:
+    """ Show the events of the creation worker in the window.
+
+    :param events: The events returned by the worker since the last update.
+    """
+    for event in events:
+        status, world_name = event[:2]
+        if status == worker.START:
+            logging.info(f"Starting execution of '{world_name}'")
+            window["progress_bar"].UpdateBar(0)
+        elif status == worker.PROGRESS:
+            window["progress_bar"].UpdateBar(event[2])
+        elif status == worker.DONE:
+            logging.info(f"Execution of '{world_name}' finished successfully")
+            window["progress_bar"].UpdateBar(0)
+        elif status == worker.CANCELLED:
+            logging.info(f"Execution of '{world_name}' cancelled")
+            window["progress_bar"].UpdateBar(0)
+        elif status == worker.ERROR:
+            window["progress_bar"].UpdateBar(0)
+            sg.popup_error(f"Failed to create '{world_name}'", event[2])
 
 
 window = window.FwcWindow(title='Fast world creator', icon="assets/logo64.ico")
-window.create_layouts(game_modes, difficulties, available_datapacks, gamerules,
-                      biomes).finalize()
-window.set_values_from_dict(ui_defaults)
+window.create_layouts(game_modes, difficulties, get_available_datapacks(),
+                      get_gamerules(), get_biomes()).finalize()
+window.set_values_from_dict(
+    cu.get_default_ui_values(config.get("UI", "template_file")))
+creation_worker = worker.CreationWorker()
+creation_worker.start()
 
 while True:
-    event, val_dict = window.read(1000)
+    # Short timeout, so the progress of the worker is shown without delay
+    event, val_dict = window.read(100)
+    update_progress(creation_worker.get_events())
     if event in [None, 'Quit']:  # if user closes window or clicks quit
         break
     elif event == "Create":
-        for status in create(val_dict):
-            window.read(timeout=20)
-            if status == "start":
-                logging.info("Starting execution")
-            elif status == "done":
-                logging.info("Execution finished successfully")
-                window["progress_bar"].UpdateBar(0)
-            else:
-                window["progress_bar"].UpdateBar(status)
+        creation_worker.submit(*create(val_dict))
+    elif event == "Cancel":
+        creation_worker.cancel()
     elif event == "Save":
         cu.set_default_ui_values(val_dict, config.get("UI", "template_file"))
     elif event == "Load":
@@ -144,4 +175,5 @@ while True:
     else:
         window.parse_events(event, val_dict)
 
+creation_worker.stop()
 window.close()
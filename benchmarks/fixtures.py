@@ -0,0 +1,151 @@
+""" Synthetic Minecraft installations for the benchmarks.
+
+The fixtures mimic the layout the application expects:
+
+    <root>/.minecraft/versions/<version>/<version>.jar
+    <root>/.minecraft/saves/
+    <root>/app/assets/datapacks/*.zip
+
+The client jars contain a version.json, filler class files and loot tables,
+recipes and advancements with realistic counts and sizes, so the jar handling
+code does the same amount of work as with a real client jar.
+"""
+import json
+import os
+import random
+import shutil
+import tempfile
+from zipfile import ZipFile, ZIP_DEFLATED
+
+# Data versions of the releases used in the fixtures
+FIXTURE_VERSIONS = {"1.15.2": 2230, "1.14.4": 1976}
+ITEMS = ["diamond", "iron_ingot", "gold_ingot", "emerald", "bread", "apple",
+         "arrow", "bone", "string", "gunpowder", "rotten_flesh", "coal",
+         "saddle", "name_tag", "golden_apple", "enchanted_book", "lapis_lazuli"]
+LOOT_CATEGORIES = ["blocks", "chests", "entities", "gameplay"]
+
+
+def get_default_root() -> str:
+    """ Get a memory backed folder for the fixtures if there is one. """
+    if os.path.isdir("/dev/shm"):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+def _loot_table(rnd: random.Random) -> str:
+    """ Create a pretty-printed loot table of 0.3 to 6 KB. """
+    pools = []
+    for _ in range(rnd.randint(1, 4)):
+        pools.append({
+            "rolls": {"min": 1, "max": rnd.randint(1, 8)},
+            "entries": [
+                {
+                    "type": "minecraft:item",
+                    "weight": rnd.randint(1, 20),
+                    "name": f"minecraft:{rnd.choice(ITEMS)}",
+                    "functions": [{
+                        "function": "minecraft:set_count",
+                        "count": {"min": 1, "max": rnd.randint(1, 16)}
+                    }]
+                } for _ in range(rnd.randint(1, 10))
+            ]
+        })
+    return json.dumps({"type": "minecraft:chest", "pools": pools}, indent=2)
+
+
+def create_client_jar(jar_path: str, version: str, data_version: int,
+                      loot_tables: int = 1100, recipes: int = 700,
+                      advancements: int = 600, classes: int = 6000) -> None:
+    """ Create a fake client jar.
+
+    :param jar_path: The path of the jar to create.
+    :param version: The version name (e.g. '1.15.2').
+    :param data_version: The data version stored in version.json.
+    :param loot_tables: The amount of loot tables.
+    :param recipes: The amount of recipes.
+    :param advancements: The amount of advancements.
+    :param classes: The amount of filler class files, which make the jar as
+        large as a real one.
+    """
+    rnd = random.Random(version)
+    with ZipFile(jar_path, "w", ZIP_DEFLATED) as jar:
+        jar.writestr("version.json", json.dumps({
+            "id": version, "name": version, "world_version": data_version,
+            "protocol_version": 578, "pack_version": 5, "stable": True
+        }, indent=2))
+        for i in range(classes):
+            # Half random, half repetitive, like compiled classes
+            jar.writestr(f"net/minecraft/{i // 500}/C{i}.class",
+                         os.urandom(600) + b"\x00\x01" * rnd.randint(50, 600))
+        for i in range(loot_tables):
+            category = LOOT_CATEGORIES[i % len(LOOT_CATEGORIES)]
+            jar.writestr(f"data/minecraft/loot_tables/{category}/table_{i}"
+                         f".json", _loot_table(rnd))
+        for i in range(recipes):
+            jar.writestr(f"data/minecraft/recipes/recipe_{i}.json", json.dumps({
+                "type": "minecraft:crafting_shaped",
+                "pattern": ["###", "# #", "###"],
+                "key": {"#": {"item": f"minecraft:{rnd.choice(ITEMS)}"}},
+                "result": {"item": f"minecraft:{rnd.choice(ITEMS)}",
+                           "count": rnd.randint(1, 8)}
+            }, indent=2))
+        for i in range(advancements):
+            jar.writestr(
+                f"data/minecraft/advancements/story/advancement_{i}.json",
+                json.dumps({
+                    "display": {"title": f"Advancement {i}",
+                                "description": "Synthetic advancement"},
+                    "criteria": {"tick": {"trigger": "minecraft:tick"}},
+                    "rewards": {"experience": rnd.randint(1, 100)}
+                }, indent=2))
+
+
+def create_datapack(zip_path: str, name: str, functions: int = 40) -> None:
+    """ Create an external datapack with functions and a load tag.
+
+    :param zip_path: The path of the zip to create.
+    :param name: The namespace and description of the datapack.
+    :param functions: The amount of .mcfunction files.
+    """
+    rnd = random.Random(name)
+    with ZipFile(zip_path, "w", ZIP_DEFLATED) as zip_f:
+        zip_f.writestr("pack.mcmeta", json.dumps({
+            "pack": {"pack_format": 5, "description": f"Datapack {name}"}
+        }, indent=4))
+        zip_f.writestr("data/minecraft/tags/functions/load.json", json.dumps(
+            {"values": [f"{name}:load"]}, indent=4))
+        for i in range(functions):
+            lines = [f"# Function {i} of {name}", ""]
+            lines += [f"execute as @a run say {rnd.random()}"
+                      for _ in range(rnd.randint(5, 60))]
+            zip_f.writestr(f"data/{name}/functions/function_{i}.mcfunction",
+                           "\n".join(lines))
+
+
+def create_fixture(root: str = None, loot_tables: int = 1100,
+                   datapacks: int = 20) -> str:
+    """ Create a synthetic Minecraft installation and application folder.
+
+    :param root: The folder to create the fixture in. Defaults to /dev/shm
+        when available.
+    :param loot_tables: The amount of loot tables per client jar.
+    :param datapacks: The amount of external datapacks.
+    :return: The path to the fixture folder.
+    """
+    fixture = tempfile.mkdtemp(prefix="fwc_bench_", dir=root or
+                               get_default_root())
+    os.makedirs(f"{fixture}/.minecraft/saves")
+    for version, data_version in FIXTURE_VERSIONS.items():
+        version_folder = f"{fixture}/.minecraft/versions/{version}"
+        os.makedirs(version_folder)
+        create_client_jar(f"{version_folder}/{version}.jar", version,
+                          data_version, loot_tables)
+    datapack_folder = f"{fixture}/app/assets/datapacks"
+    os.makedirs(datapack_folder)
+    for i in range(datapacks):
+        create_datapack(f"{datapack_folder}/pack_{i}.zip", f"pack_{i}")
+    return fixture
+
+
+def remove_fixture(fixture: str) -> None:
+    shutil.rmtree(fixture, ignore_errors=True)
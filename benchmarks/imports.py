@@ -0,0 +1,94 @@
+""" Import budget check for the headless modules.
+
+Usage: python -m benchmarks.imports [--budget-ms 500] [module ...]
+
+Imports every module in a fresh interpreter with -X importtime, from an empty
+folder and without a Minecraft installation. A module fails the check if its
+import loads the graphical interface, reads the assets or the Minecraft
+folder, or takes longer than the budget. Exits with status 1 on failure.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import List
+
+HEADLESS_MODULES = ["fast_world_creator.core", "fast_world_creator.batch"]
+FORBIDDEN_MODULES = ["PySimpleGUI", "tkinter", "fast_world_creator.ui"]
+# Paths that no module should touch while it is being imported
+FORBIDDEN_PATHS = ["assets", ".minecraft", "config.ini"]
+
+# Records the files and folders accessed during the import through audit hooks
+AUDIT_SCRIPT = """
+import json, sys
+accessed = []
+def hook(event, args):
+    if event in ("open", "os.listdir", "os.scandir") and args:
+        accessed.append(str(args[0]))
+sys.addaudithook(hook)
+import {module}
+print(json.dumps(accessed))
+"""
+
+
+def check_module(module: str, budget_ms: float) -> List[str]:
+    """ Import a module in a new interpreter and check its import budget.
+
+    :param module: The name of the module to import.
+    :param budget_ms: The maximum cumulative import time of the module.
+    :return: The problems found, empty if the module is within budget.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root, APPDATA="")
+    with tempfile.TemporaryDirectory() as empty_folder:
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c",
+             AUDIT_SCRIPT.format(module=module)],
+            cwd=empty_folder, env=env, capture_output=True, text=True)
+    if process.returncode:
+        error = [line for line in process.stderr.splitlines()
+                 if not line.startswith("import time:")]
+        return ["import failed:", *error]
+
+    problems = []
+    imported = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            imported[name.strip()] = int(cumulative) / 1000
+    for name in imported:
+        if any(name == f or name.startswith(f"{f}.")
+               for f in FORBIDDEN_MODULES):
+            problems.append(f"imports {name}")
+    for path in json.loads(process.stdout.strip().splitlines()[-1]):
+        if any(f in path.replace("\\", "/").split("/")
+               for f in FORBIDDEN_PATHS):
+            problems.append(f"accesses {path}")
+    elapsed = imported.get(module, 0.0)
+    print(f"{module:32} {elapsed:8.1f} ms  {len(imported)} modules")
+    if elapsed > budget_ms:
+        problems.append(f"takes {elapsed:.1f}ms (budget {budget_ms:.0f}ms)")
+    return problems
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.imports")
+    parser.add_argument("modules", nargs="*", default=HEADLESS_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=500,
+                        help="Maximum cumulative import time of a module")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        for problem in check_module(module, args.budget_ms):
+            print(f"  {problem}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+""" Benchmark of the level.dat serializers.
+
+Usage: python -m benchmarks.level_dat [--iterations N]
+
+Compares LevelFile.from_arguments, which merges the template, dumps it as
+JSON and parses it back as NBT for every world, with the compiled serializer
+used by WorldCreator. Also checks that both produce the same bytes.
+"""
+import argparse
+import io
+import timeit
+
+from fast_world_creator.new_world.level_dat import LevelFile, \
+    get_compiled_level_dat
+from fast_world_creator.new_world.world_creator import WorldCreator
+from fast_world_creator.utils.level_dat_utils import \
+    get_default_border_settings, get_default_gamerules
+
+
+def get_level_dat_dicts() -> dict:
+    """ Build the level.dat values of a few representative worlds. """
+    wc = WorldCreator("1.15.2", "Benchmark_World", 123456789)
+    gamerules = {k: str(v).lower() for k, v in get_default_gamerules().items()}
+    common = {
+        "gamerules": gamerules,
+        "difficulty": 4,
+        "datapack_list": ["random_loot", "first_pack", "second_pack"],
+        "border_settings": get_default_border_settings(),
+        "thundering": True
+    }
+    buffet_options = {
+        "buffet_biome_type": "checkerboard",
+        "buffet_biomes": ["plains", "desert", "jungle"],
+        "buffet_size": 3,
+        "buffet_block": "stone",
+        "buffet_fluid": "water",
+        "buffet_chunk_type": "caves"
+    }
+    return {
+        "default": wc.build_level_dat_dict(**common),
+        "buffet": wc.build_level_dat_dict(generator="buffet",
+                                          generator_opts=buffet_options,
+                                          **common)
+    }
+
+
+def encode_from_arguments(level_dat_dict: dict) -> bytes:
+    buff = io.BytesIO()
+    LevelFile.from_arguments(level_dat_dict).write(buff)
+    return buff.getvalue()
+
+
+def encode_compiled(level_dat_dict: dict) -> bytes:
+    return get_compiled_level_dat(
+        level_dat_dict["Version"], tuple(level_dat_dict)).encode(level_dat_dict)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.level_dat")
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    for name, level_dat_dict in get_level_dat_dicts().items():
+        identical = encode_from_arguments(level_dat_dict) == \
+            encode_compiled(level_dat_dict)
+        from_arguments = timeit.timeit(
+            lambda: encode_from_arguments(level_dat_dict),
+            number=args.iterations) / args.iterations
+        compiled = timeit.timeit(
+            lambda: encode_compiled(level_dat_dict),
+            number=args.iterations) / args.iterations
+        print(f"{name:8} from_arguments {from_arguments * 1e6:9.1f} us  "
+              f"compiled {compiled * 1e6:9.1f} us  "
+              f"speedup {from_arguments / compiled:5.1f}x  "
+              f"identical: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+""" Benchmark suite for the world creation hot paths.
+
+Usage: python -m benchmarks.suite [--output results.json]
+                                  [--baseline baseline.json] [--threshold 0.1]
+
+Builds a synthetic .minecraft installation (on tmpfs when available), times
+the hot paths and saves the results as JSON. When a baseline is given, every
+benchmark whose median is slower than the baseline by more than the threshold
+is reported as a regression and the command exits with status 1.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+from benchmarks import fixtures
+
+BENCHMARK_VERSION = "1.15.2"
+
+
+class Benchmark:
+    """ A timed function with an optional untimed setup and teardown. """
+
+    def __init__(self, name: str, func: Callable[[int], None],
+                 setup: Callable[[int], None] = None,
+                 teardown: Callable[[int], None] = None):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.teardown = teardown
+
+    def run(self, repeat: int) -> List[float]:
+        """ Run the benchmark and return the seconds of every repetition. """
+        timings = []
+        for i in range(repeat):
+            if self.setup:
+                self.setup(i)
+            start = time.perf_counter()
+            self.func(i)
+            timings.append(time.perf_counter() - start)
+            if self.teardown:
+                self.teardown(i)
+        return timings
+
+
+def get_benchmarks(fixture: str) -> List[Benchmark]:
+    """ Create the benchmarks of the suite for a fixture.
+
+    The application modules read the installation folders when they are
+    used, so they are pointed to the fixture before running anything.
+
+    :param fixture: The fixture folder created by fixtures.create_fixture.
+    :return: The benchmarks, in the order they should run.
+    """
+    from fast_world_creator import core
+    from fast_world_creator.datapacks import jar_datapack as jd
+    from fast_world_creator.datapacks.random_advancements import \
+        RandomAdvancementsDataPack
+    from fast_world_creator.datapacks.random_loot import RandomLootDataPack
+    from fast_world_creator.datapacks.random_recipes import \
+        RandomRecipesDataPack
+    from fast_world_creator.new_world import world_names
+    from fast_world_creator.new_world.level_dat import LevelFile
+    from fast_world_creator.new_world.world_creator import WorldCreator
+    from fast_world_creator.utils import cache_utils
+    from fast_world_creator.utils import common_utils as cu
+    from fast_world_creator.utils import jar_index
+    from fast_world_creator.utils.level_dat_utils import \
+        get_default_border_settings, get_default_gamerules
+
+    app_folder = f"{fixture}/app"
+    os.chdir(app_folder)
+    cu.MC_FOLDER = f"{fixture}/.minecraft"
+    cache_utils.CACHE_FOLDER = f"{app_folder}/cache"
+    cu.find_installed_minecraft_versions.cache_clear()
+    cu.get_installed_version_index.cache_clear()
+
+    gamerules = {k: str(v).lower() for k, v in get_default_gamerules().items()}
+    border_settings = get_default_border_settings()
+    datapacks = cu.get_available_datapacks()
+    state = {}
+
+    def clear_cache(_):
+        shutil.rmtree(cache_utils.CACHE_FOLDER, ignore_errors=True)
+        jar_index._jar_indexes.clear()
+
+    # Every benchmark uses its own seeds, so none of them reuses a random_loot
+    # zip stored in the artifact store by another one
+    def run_core(i):
+        core.create_world(
+            version=BENCHMARK_VERSION, world_name=f"bench_core_{i}",
+            seed=3000 + i,
+            datapacks=datapacks, gamerules=gamerules,
+            border_settings=border_settings)
+
+    def setup_world(prefix):
+        def setup(i):
+            wc = WorldCreator(BENCHMARK_VERSION, f"{prefix}_{i}", seed=i)
+            wc.create_world_directory()
+            wc.create_datapack_directory()
+            state["wc"] = wc
+        return setup
+
+    def run_level_dat(_):
+        state["wc"].create_level_dat(
+            gamerules=gamerules, difficulty=2,
+            datapack_list=[d.name for d in datapacks],
+            border_settings=border_settings)
+
+    def setup_from_arguments(i):
+        wc = WorldCreator(BENCHMARK_VERSION, f"bench_from_arguments_{i}", i)
+        state["level_dat_dict"] = wc.build_level_dat_dict(
+            gamerules=gamerules, difficulty=2,
+            datapack_list=[d.name for d in datapacks],
+            border_settings=border_settings)
+
+    def run_random_loot(seed_base):
+        def run(i):
+            RandomLootDataPack().create_datapack_files(
+                state["wc"].datapack_dir, seed=seed_base + i,
+                version=BENCHMARK_VERSION)
+        return run
+
+    def run_jar_pipeline(_):
+        # Without a seed nothing is looked up in the artifact store, so the
+        # files are always read and decompressed
+        jd.prepare_jar_datapacks(
+            [RandomRecipesDataPack(), RandomAdvancementsDataPack()],
+            BENCHMARK_VERSION)
+
+    def run_allocate_names(i):
+        # Lists the saves folder, then numbers every repeated name
+        allocator = world_names.WorldNameAllocator(f"{cu.MC_FOLDER}/saves")
+        for _ in range(100):
+            allocator.allocate(f"bench_names_{i}")
+
+    def setup_random_loot_cold(i):
+        clear_cache(i)
+        setup_world("bench_loot_cold")(i)
+
+    return [
+        Benchmark("get_available_datapacks",
+                  lambda _: cu.get_available_datapacks()),
+        Benchmark("LevelFile.from_arguments",
+                  lambda _: LevelFile.from_arguments(state["level_dat_dict"]),
+                  setup=setup_from_arguments),
+        Benchmark("WorldCreator.create_level_dat", run_level_dat,
+                  setup=setup_world("bench_level_dat")),
+        Benchmark("RandomLootDataPack.cold_cache", run_random_loot(1000),
+                  setup=setup_random_loot_cold),
+        Benchmark("RandomLootDataPack.new_seed", run_random_loot(2000),
+                  setup=setup_world("bench_loot_warm")),
+        Benchmark("prepare_jar_datapacks", run_jar_pipeline),
+        Benchmark("WorldNameAllocator.allocate", run_allocate_names),
+        Benchmark("core.run", run_core),
+    ]
+
+
+def run_suite(fixture: str, repeat: int) -> Dict[str, dict]:
+    """ Run every benchmark of the suite.
+
+    :param fixture: The fixture folder created by fixtures.create_fixture.
+    :param repeat: The amount of timed repetitions of every benchmark.
+    :return: The statistics of every benchmark, in seconds.
+    """
+    owd = os.getcwd()
+    results = {}
+    try:
+        for benchmark in get_benchmarks(fixture):
+            timings = benchmark.run(repeat)
+            results[benchmark.name] = {
+                "min": min(timings),
+                "median": statistics.median(timings),
+                "mean": statistics.mean(timings),
+                "max": max(timings),
+                "repeat": repeat
+            }
+            print(f"{benchmark.name:32} median "
+                  f"{results[benchmark.name]['median'] * 1000:10.3f} ms  "
+                  f"min {results[benchmark.name]['min'] * 1000:10.3f} ms")
+    finally:
+        os.chdir(owd)
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict],
+            threshold: float) -> List[str]:
+    """ Compare the medians of the results with a stored baseline.
+
+    :param results: The benchmark statistics of this run.
+    :param baseline: The benchmark statistics of the baseline run.
+    :param threshold: The tolerated slowdown (e.g. 0.1 for 10%).
+    :return: The names of the benchmarks that regressed.
+    """
+    regressions = []
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        ratio = stats["median"] / baseline[name]["median"]
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:32} {ratio:6.2f}x of baseline"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("-o", "--output", default="bench_results.json",
+                        help="File to store the results in")
+    parser.add_argument("-b", "--baseline", default=None,
+                        help="Results of a previous run to compare with")
+    parser.add_argument("-t", "--threshold", type=float, default=0.1,
+                        help="Tolerated slowdown over the baseline (0.1=10%%)")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--root", default=None,
+                        help="Folder for the fixtures (default: /dev/shm)")
+    parser.add_argument("--loot-tables", type=int, default=1100)
+    parser.add_argument("--datapacks", type=int, default=20)
+    parser.add_argument("--keep", action="store_true",
+                        help="Do not delete the fixtures afterwards")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    print("Creating fixtures...")
+    fixture = fixtures.create_fixture(args.root, args.loot_tables,
+                                      args.datapacks)
+    try:
+        results = run_suite(fixture, args.repeat)
+    finally:
+        if args.keep:
+            print(f"Fixtures kept in {fixture}")
+        else:
+            fixtures.remove_fixture(fixture)
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "loot_tables": args.loot_tables,
+                "datapacks": args.datapacks,
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+            },
+            "results": results
+        }, f, indent=4)
+    print(f"Results stored in {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over "
+                  f"{args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
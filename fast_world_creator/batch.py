@@ -0,0 +1,314 @@
+""" Headless creation of Minecraft worlds from a manifest file.
+
+Usage: python -m fast_world_creator.batch manifest.json [--processes N]
+                                          [--threads]
+                                          [--minify] [--compresslevel N]
+                                          [--merge] [--clone]
+                                          [--report report.json]
+                                          [--trace trace.json]
+
+The manifest is a JSON file containing either a list of world specifications
+or an object with the optional keys 'defaults' and the list 'worlds'. Every
+world specification accepts the arguments of the core execution, with a few
+conveniences:
+
+* 'difficulty' and 'game_mode' can be names (e.g. 'Hard') or integers.
+* 'datapacks' is a list of datapack names available in assets/datapacks, plus
+  the randomizers 'random_loot', 'random_recipes' and 'random_advancements'.
+* 'gamerules' and 'border_settings' only need the values that differ from the
+  defaults.
+* 'generator_options.flat_layers' can be a layer string such as
+  'bedrock,2*dirt,grass_block'.
+* 'pregenerate_radius' writes the chunks around the spawn of flat worlds, so
+  the game does not generate them when they are first visited.
+* Worlds with a name and seed that were created before with the same
+  specification are not created again, unless 'reuse_existing' is false.
+* 'minify' and 'compresslevel' minify the datapacks of the world, and
+  'merge_datapacks' merges them into a single one. The command line options
+  set them for the worlds that do not.
+
+This module never imports the graphical interface.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Dict, List
+
+from fast_world_creator import core
+from fast_world_creator.datapacks.base_datapack import Datapack
+from fast_world_creator.utils import common_utils as cu
+from fast_world_creator.utils import minecraft_utils as mu
+from fast_world_creator.utils import trace_utils as tu
+from fast_world_creator.utils.level_dat_utils import \
+    get_default_border_settings, get_default_gamerules
+
+
+def load_manifest(manifest_path: str) -> List[dict]:
+    """ Read the world specifications from a manifest file.
+
+    :param manifest_path: The path to the JSON manifest.
+    :return: The world specifications, with the manifest defaults applied.
+    """
+    logging.info(f"Reading manifest '{manifest_path}'")
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {"worlds": manifest}
+    defaults = manifest.get("defaults", {})
+    specs = []
+    for world in manifest.get("worlds", []):
+        spec = dict(defaults)
+        spec.update(world)
+        specs.append(spec)
+    logging.info(f"Found {len(specs)} world(s) in the manifest")
+    return specs
+
+
+@lru_cache(maxsize=1)
+def _get_datapacks_by_name() -> Dict[str, Datapack]:
+    """ Get the available datapacks, once per process. """
+    return {dp.name: dp for dp in cu.get_available_datapacks()}
+
+
+def _parse_enum(value, enum_type) -> int:
+    """ Convert an enum name (e.g. 'Hard') or an integer to an integer. """
+    if isinstance(value, str) and not value.isdigit():
+        return int(enum_type[value.upper()])
+    return int(value)
+
+
+def spec_to_arguments(spec: dict) -> dict:
+    """ Convert a world specification into arguments for the core execution.
+
+    :param spec: A single world specification from the manifest.
+    :return: The keyword arguments for core.run.
+    """
+    available_datapacks = _get_datapacks_by_name()
+    datapacks = []
+    for name in spec.get("datapacks", []):
+        if name not in available_datapacks:
+            raise ValueError(f"Datapack '{name}' is not available")
+        datapacks.append(available_datapacks[name])
+
+    gamerules = get_default_gamerules()
+    gamerules.update(spec.get("gamerules", {}))
+    border_settings = get_default_border_settings()
+    border_settings.update(spec.get("border_settings", {}))
+
+    generator_options = dict(spec.get("generator_options") or {})
+    if isinstance(generator_options.get("flat_layers"), str):
+        generator_options["flat_layers"] = mu.parse_flat_layers(
+            generator_options["flat_layers"])
+
+    return {
+        "version": spec["version"],
+        "world_name": str(spec.get("world_name") or "").replace(" ", "_"),
+        "seed": spec.get("seed"),
+        "difficulty": _parse_enum(spec.get("difficulty", 2), mu.Difficulties),
+        "datapacks": datapacks,
+        # Gamerules always stored as strings in level.dat
+        "gamerules": {k: str(v).lower() for k, v in gamerules.items()},
+        "game_mode": _parse_enum(spec.get("game_mode", 0), mu.GameModes),
+        "generator": spec.get("generator", "default").lower(),
+        "generator_options": generator_options,
+        "raining": bool(spec.get("raining", False)),
+        "thundering": bool(spec.get("thundering", False)),
+        "border_settings": border_settings,
+        "minify": bool(spec.get("minify", False)),
+        "compresslevel": spec.get("compresslevel"),
+        "merge_datapacks": bool(spec.get("merge_datapacks", False)),
+        "pregenerate_radius": int(spec.get("pregenerate_radius", 0)),
+        "reuse_existing": bool(spec.get("reuse_existing", True))
+    }
+
+
+def create_world(spec: dict, trace: bool = False,
+                 golden_dir: str = None) -> dict:
+    """ Create a single world and report the outcome.
+
+    Never raises, so a failing world does not stop the rest of the batch.
+
+    :param spec: A single world specification from the manifest.
+    :param trace: Whether to add the Chrome trace events of every stage to
+        the result.
+    :param golden_dir: The folder of a golden world created with the same
+        specification except for the world name and seed, to create the world
+        as its clone.
+    :return: A dictionary with the world name, path, success flag, error
+        message, the elapsed seconds, whether an existing world was returned
+        and the bytes saved by minifying every datapack.
+    """
+    result = {
+        "world_name": spec.get("world_name"),
+        "path": None,
+        "success": False,
+        "error": None
+    }
+    spans = []
+    with tu.Span(f"world {spec.get('world_name') or '<random name>'}",
+                 "batch") as world_span:
+        try:
+            if golden_dir:
+                result["path"] = core.create_world_clone(
+                    golden_dir, **spec_to_arguments(spec), spans=spans)
+            else:
+                result["path"] = core.create_world(**spec_to_arguments(spec),
+                                                   spans=spans)
+            result["success"] = True
+        except Exception as e:
+            logging.exception(
+                f"Failed to create world '{spec.get('world_name')}'")
+            result["error"] = f"{type(e).__name__}: {e}"
+    result["elapsed"] = world_span.duration
+    result["reused"] = any(s.args.get("existing") for s in spans)
+    result["bytes_saved"] = {
+        s.name[:-len(".minify")]: s.args["bytes_saved"]
+        for s in spans if s.name.endswith(".minify")
+    }
+    if trace:
+        result["trace_events"] = [
+            s.to_trace_event() for s in [world_span, *spans]]
+    return result
+
+
+def _get_clone_key(spec: dict) -> str:
+    """ Get what a world specification has in common with its clones. """
+    return json.dumps({k: v for k, v in spec.items()
+                       if k not in ("world_name", "seed")}, sort_keys=True)
+
+
+def run_batch(specs: List[dict], processes: int = None,
+              trace: bool = False, threads: bool = False,
+              clone: bool = False) -> dict:
+    """ Create every world of a manifest on a pool of processes.
+
+    In clone mode, the worlds that only differ in name and seed are created
+    as clones of the first one of them, the golden world, which is created
+    first. If a golden world fails, its clones are created normally.
+
+    :param specs: The world specifications.
+    :param processes: The amount of worker processes. Defaults to the amount
+        of CPUs in the system.
+    :param trace: Whether to add the Chrome trace events of every world to
+        its result.
+    :param threads: Whether to use threads of this process instead of worker
+        processes, which avoids starting a process per worker.
+    :param clone: Whether to clone the worlds that only differ in name and
+        seed instead of creating them.
+    :return: A dictionary containing the per-world results in manifest order,
+        the total elapsed seconds and the throughput in worlds per second.
+    """
+    processes = processes or os.cpu_count() or 1
+    executor_type = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    logging.info(f"Creating {len(specs)} world(s) with {processes} "
+                 f"{'thread(s)' if threads else 'process(es)'}")
+    start = time.perf_counter()
+    with executor_type(max_workers=processes) as executor:
+        if not clone:
+            results = list(executor.map(partial(create_world, trace=trace),
+                                        specs))
+        else:
+            groups = {}
+            for i, spec in enumerate(specs):
+                groups.setdefault(_get_clone_key(spec), []).append(i)
+            results = [None] * len(specs)
+            goldens = [indexes[0] for indexes in groups.values()]
+            for i, result in zip(goldens, executor.map(
+                    partial(create_world, trace=trace),
+                    [specs[i] for i in goldens])):
+                results[i] = result
+            clones = [(i, results[indexes[0]]["path"])
+                      for indexes in groups.values() for i in indexes[1:]]
+            logging.info(f"Cloning {len(clones)} world(s) from "
+                         f"{len(goldens)} golden world(s)")
+            for (i, _), result in zip(clones, executor.map(
+                    create_world, [specs[i] for i, _ in clones],
+                    [trace] * len(clones),
+                    [golden_dir for _, golden_dir in clones])):
+                results[i] = result
+    elapsed = time.perf_counter() - start
+    created = sum(1 for r in results if r["success"])
+    throughput = created / elapsed if elapsed else 0.0
+    logging.info(f"Created {created}/{len(specs)} world(s) in {elapsed:.2f}s "
+                 f"({throughput:.2f} worlds/s)")
+    return {
+        "results": results,
+        "created": created,
+        "failed": len(specs) - created,
+        "elapsed": elapsed,
+        "worlds_per_second": throughput
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m fast_world_creator.batch",
+        description="Create Minecraft worlds in bulk from a JSON manifest.")
+    parser.add_argument("manifest", help="Path to the JSON manifest")
+    parser.add_argument("-p", "--processes", type=int, default=None,
+                        help="Amount of worker processes (default: CPU count)")
+    parser.add_argument("--threads", action="store_true",
+                        help="Use threads of a single process as workers")
+    parser.add_argument("-r", "--report", default=None,
+                        help="Write the full results to this JSON file")
+    parser.add_argument("-t", "--trace", default=None,
+                        help="Write the stages of every world to this file "
+                             "as Chrome trace-event JSON")
+    parser.add_argument("-m", "--minify", action="store_true",
+                        help="Minify the JSON and function files of the "
+                             "datapacks")
+    parser.add_argument("-c", "--compresslevel", type=int, default=None,
+                        choices=range(10), metavar="{0-9}",
+                        help="Compression level of the minified datapacks "
+                             "(default: zlib default)")
+    parser.add_argument("--merge", action="store_true",
+                        help="Merge the datapacks of every world into a "
+                             "single one")
+    parser.add_argument("--clone", action="store_true",
+                        help="Clone the worlds that only differ in name and "
+                             "seed from the first one of them")
+    args = parser.parse_args(argv)
+
+    config = cu.get_or_create_config()
+    log_format = "[%(asctime)s] [%(levelname)s] %(module)s - %(message)s"
+    logging.basicConfig(filename=config.get("LOGGING", "file"), filemode="w",
+                        format=log_format, level=logging.getLevelName(
+                            config.get("LOGGING", "level") or "INFO"))
+
+    specs = load_manifest(args.manifest)
+    for spec in specs:
+        if args.minify:
+            spec.setdefault("minify", True)
+        if args.compresslevel is not None:
+            spec.setdefault("compresslevel", args.compresslevel)
+        if args.merge:
+            spec.setdefault("merge_datapacks", True)
+    summary = run_batch(specs, args.processes, trace=bool(args.trace),
+                        threads=args.threads, clone=args.clone)
+    if args.trace:
+        tu.save_chrome_trace([e for r in summary["results"]
+                              for e in r.pop("trace_events")], args.trace)
+    for r in summary["results"]:
+        status = "OK" if r["success"] else f"FAILED ({r['error']})"
+        if r["reused"]:
+            status += " (existing)"
+        print(f"{r['elapsed']:8.3f}s  {r['world_name'] or '<random name>'}: "
+              f"{status} {r['path'] or ''}".rstrip())
+        for name, saved in r["bytes_saved"].items():
+            print(f"{'':10}{name}: {saved} bytes saved")
+    print(f"Created {summary['created']}/{len(summary['results'])} world(s) in "
+          f"{summary['elapsed']:.2f}s ({summary['worlds_per_second']:.2f} "
+          f"worlds/s)")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(summary, f, indent=4)
+    return 0 if not summary["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
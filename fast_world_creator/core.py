@@ -1,23 +1,58 @@
+import copy
+import inspect
 import logging
-import random
-from typing import Generator, List
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Generator, List, Optional, Tuple
 
+from fast_world_creator.datapacks import jar_datapack as jd
 from fast_world_creator.datapacks.base_datapack import Datapack
-from fast_world_creator.new_world import world_creator
+from fast_world_creator.new_world import region, world_cloner, \
+    world_creator, world_index
 from fast_world_creator.utils import common_utils as cu
+from fast_world_creator.utils import merge_utils as mgu
+from fast_world_creator.utils import trace_utils as tu
+
+# Datapacks are mostly file copies and zip writes, which release the GIL
+DATAPACK_WORKERS = 4
+# Arguments of run that do not change the created world
+TUNING_ARGUMENTS = ("datapack_workers", "region_workers", "reuse_existing")
 
 
 def run(version: str, world_name: str, seed: int, datapacks: List[Datapack],
         gamerules: dict, difficulty: int = 2, game_mode: int = 0,
         generator: str = "default", generator_options: dict = None,
         raining: bool = False, thundering: bool = False,
-        border_settings: dict = None) -> Generator[int, None, None]:
+        border_settings: dict = None,
+        datapack_workers: int = None, minify: bool = False,
+        compresslevel: int = None, merge_datapacks: bool = False,
+        pregenerate_radius: int = 0, region_workers: int = None,
+        reuse_existing: bool = True) -> Generator[tu.Span, None, str]:
     """ Create a minecraft world with the specified parameters.
 
+    Every stage of the creation is yielded as a finished span as soon as it
+    completes: the world folder creation, the create and store stages of
+    every datapack (only create if it failed, plus minify if enabled), and
+    the level.dat encoding and saving. If any datapack is built from the
+    client jar, the jar is read once for all of them first, in a
+    'jar_pipeline' span. If the datapacks are merged, the merge follows the
+    datapack stages, in a 'merge_datapacks' span. The pregeneration of the
+    regions of flat worlds comes next, in a 'pregenerate_regions' span.
+
+    Worlds with a name and seed are fingerprinted by all the inputs that
+    change them, including the contents of the datapacks. If the same world
+    was created before and has not changed since, it is returned instead of
+    creating it again, and only a 'find_existing_world' span is yielded.
+
+    The datapacks are created at the same time on a pool of threads. Their
+    spans are yielded in the order they finish, but the datapacks are
+    enabled in level.dat in the order of the datapacks list.
+
     :param version: Version name (e.g. '1.15.2')
     :param world_name: The name of the world to create.
     :param seed: The seed to use for the Minecraft world and the randomization
-        of the random_loot datapack.
+        of the randomizer datapacks.
     :param datapacks: List of datapacks to enable for the world.
     :param gamerules: Dictionary containing all the gamerules for the version
         and the values to apply.
@@ -31,36 +66,333 @@ def run(version: str, world_name: str, seed: int, datapacks: List[Datapack],
         the raining parameter if set to True.
     :param border_settings: Dictionary containing all the options for the world
         border.
+    :param datapack_workers: The maximum amount of datapacks created at the
+        same time. Defaults to DATAPACK_WORKERS.
+    :param minify: Whether to minify the JSON and function files of the
+        datapacks, which makes them smaller and faster to load.
+    :param compresslevel: The zlib compression level of the minified
+        datapacks. Defaults to the zlib default.
+    :param merge_datapacks: Whether to merge the datapacks into a single zip,
+        which is the only one enabled in the world. Files are resolved in the
+        order of the datapacks list, and the conflicts are reported in the
+        datapacks folder.
+    :param pregenerate_radius: For the flat generator, the chunks around the
+        spawn chunk to write in the region files of the world, in every
+        direction, so the game does not have to generate them.
+    :param region_workers: The maximum amount of region files written at the
+        same time. Defaults to the amount of CPUs in the system.
+    :param reuse_existing: Whether to return the same world created before
+        instead of creating it again.
+    :return: The path to the created world folder, as the generator's return
+        value.
     """
     wc = world_creator.WorldCreator(
         mc_release=version,
-        world_name=world_name or f"FastNewWorld_{random.randint(0, 1000000)}",
+        world_name=world_name,
         seed=seed
     )
-    owd = cu.change_directory(wc.create_world_directory())
-    yield
-    created_datapacks = []
+    inputs = fingerprint = None
+    if reuse_existing and world_name and seed is not None and seed != "":
+        span, inputs, fingerprint = _find_existing_world(
+            wc, version, datapacks, dict(
+                gamerules=gamerules, difficulty=difficulty,
+                game_mode=game_mode, generator=generator,
+                generator_options=generator_options, raining=raining,
+                thundering=thundering, border_settings=border_settings,
+                minify=minify, compresslevel=compresslevel,
+                merge_datapacks=merge_datapacks,
+                pregenerate_radius=pregenerate_radius))
+        if span.args["existing"]:
+            yield span
+            return span.args["existing"]
+    with tu.Span("create_world_directory") as span:
+        span.args["path"] = wc.create_world_directory()
+        if datapacks:
+            wc.create_datapack_directory()
+    yield span
+    created = [False] * len(datapacks or [])
     if datapacks:
-        wc.create_datapack_directory()
-        for d in datapacks:
-            logging.info(f"Creating datapack '{d.name}'")
-            created = d.create_datapack_files(seed=wc.seed, version=version)
-            if created:
-                created_datapacks.append(d.name)
-                yield
-            else:
-                logging.warning(f"Failed to create '{d.name}'")
-                yield
-    wc.create_level_dat(
-        datapack_list=created_datapacks,
-        difficulty=difficulty,
-        gamerules=gamerules,
-        game_mode=game_mode,
-        generator=generator,
-        generator_opts=generator_options,
-        raining=raining,
-        thundering=thundering,
-        border_settings=border_settings
+        # The datapack objects are shared between worlds, which might be
+        # created at the same time
+        copies = [copy.copy(d) for d in datapacks]
+        if any(isinstance(d, jd.JarDatapack) for d in copies):
+            with tu.Span("jar_pipeline", "datapack") as span:
+                span.args["files"] = jd.prepare_jar_datapacks(
+                    copies, version, wc.seed)
+            yield span
+        with ThreadPoolExecutor(
+                max_workers=datapack_workers or DATAPACK_WORKERS) as executor:
+            futures = {
+                executor.submit(d.create_datapack_files, wc.datapack_dir,
+                                seed=wc.seed, version=version, minify=minify,
+                                compresslevel=compresslevel): i
+                for i, d in enumerate(copies)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                created[i] = future.result()
+                if not created[i]:
+                    logging.warning(f"Failed to create '{copies[i].name}'")
+                yield from copies[i].spans
+    # Same order as the datapacks list, whichever finished first
+    created_datapacks = [
+        d.name for d, was_created in zip(datapacks or [], created)
+        if was_created
+    ]
+    if merge_datapacks and len(created_datapacks) > 1:
+        with tu.Span("merge_datapacks", "datapack") as span:
+            zip_paths = [
+                (d.name, d.get_zip_path(wc.datapack_dir))
+                for d, was_created in zip(copies, created) if was_created
+            ]
+            merged_path = f"{wc.datapack_dir}/{mgu.MERGED_DATAPACK_NAME}.zip"
+            report = mgu.merge_datapacks(
+                zip_paths, merged_path,
+                f"{wc.datapack_dir}/{mgu.MERGE_REPORT_NAME}")
+            for _, zip_path in zip_paths:
+                os.remove(zip_path)
+            created_datapacks = [mgu.MERGED_DATAPACK_NAME]
+            span.args["bytes_written"], span.args["entries"] = \
+                tu.get_zip_stats(merged_path)
+            span.args["overridden"] = len(report["overridden"])
+        yield span
+    if pregenerate_radius and generator != "flat":
+        logging.warning(f"Regions are only pregenerated for flat worlds, "
+                        f"not for '{generator}' worlds")
+    elif pregenerate_radius:
+        with tu.Span("pregenerate_regions", "region") as span:
+            span.args.update(region.pregenerate_flat_regions(
+                wc.w_dir, int(cu.get_data_version(version)),
+                generator_options.get("flat_layers"),
+                generator_options.get("flat_biome"), pregenerate_radius,
+                region_workers))
+        yield span
+    with tu.Span("level_dat.encode", "level_dat") as span:
+        level_dat = wc.encode_level_dat(
+            datapack_list=created_datapacks,
+            difficulty=difficulty,
+            gamerules=gamerules,
+            game_mode=game_mode,
+            generator=generator,
+            generator_opts=generator_options,
+            raining=raining,
+            thundering=thundering,
+            border_settings=border_settings
+        )
+        span.args["bytes"] = len(level_dat)
+    yield span
+    with tu.Span("level_dat.save", "level_dat") as span:
+        span.args["bytes_written"] = wc.save_level_dat(level_dat)
+        # Failed datapacks are retried the next time instead
+        if fingerprint and all(created):
+            world_index.register_world(wc.w_dir, fingerprint, inputs)
+    yield span
+    return wc.w_dir
+
+
+def _find_existing_world(wc: world_creator.WorldCreator, version: str,
+                         datapacks: List[Datapack], options: dict) \
+        -> Tuple[tu.Span, Optional[dict], Optional[str]]:
+    """ Look up a world created before with the same inputs.
+
+    :param wc: The world creator of the world, with its name and seed.
+    :param version: Version name (e.g. '1.15.2')
+    :param datapacks: List of datapacks to enable for the world.
+    :param options: The other arguments of run that change the world.
+    :return: The 'find_existing_world' span, with the path of the existing
+        world in its 'existing' argument (not 'path', which is only set for
+        worlds created by the execution), the inputs of the world and their
+        fingerprint. The inputs and fingerprint are None if the contents of
+        a datapack can't be known in advance.
+    """
+    with tu.Span("find_existing_world", "world_index") as span:
+        fingerprints = [d.get_fingerprint(version, wc.seed)
+                        for d in datapacks or []]
+        inputs = fingerprint = None
+        if None not in fingerprints:
+            inputs = {
+                "version": version,
+                "world_name": wc.name,
+                "seed": wc.seed,
+                "datapacks": [[d.name, f] for d, f in zip(
+                    datapacks or [], fingerprints)],
+                **options
+            }
+            fingerprint = world_index.get_world_fingerprint(inputs)
+        span.args["existing"] = fingerprint and world_index.find_world(
+            fingerprint)
+    return span, inputs, fingerprint
+
+
+@lru_cache(maxsize=8)
+def _get_world_cloner(golden_dir: str, exclude: Tuple[str, ...]) \
+        -> world_cloner.WorldCloner:
+    """ Get the cloner of a golden world, once per process. """
+    return world_cloner.WorldCloner(golden_dir, exclude)
+
+
+def clone(golden_dir: str, version: str, world_name: str, seed: int,
+          datapacks: List[Datapack] = None, minify: bool = False,
+          compresslevel: int = None, merge_datapacks: bool = False,
+          **kwargs) -> Generator[tu.Span, None, str]:
+    """ Create a minecraft world as a copy of a golden world.
+
+    The golden world must have been created by run with the same arguments,
+    except for the world name and seed. Its files are shared with or copied
+    to the new world, and only its level.dat is written again, with the name
+    and seed of the new world. The datapacks that depend on the seed are
+    created again for the new world.
+
+    Every stage is yielded as a finished span like in run: the cloning of
+    the world files, the stages of the seed dependent datapacks and the
+    level.dat patching. Like in run, the same world created before is
+    returned instead, if it has not changed since.
+
+    :param golden_dir: The folder of the golden world.
+    :param version: Version name (e.g. '1.15.2')
+    :param world_name: The name of the world to create.
+    :param seed: The seed to use for the Minecraft world and the randomization
+        of the randomizer datapacks.
+    :param datapacks: List of datapacks enabled in the golden world.
+    :param minify: Whether the datapacks of the golden world were minified.
+    :param compresslevel: The zlib compression level of the minified
+        datapacks.
+    :param merge_datapacks: Whether the datapacks of the golden world were
+        merged. Not supported with randomizer datapacks, as the merged
+        datapack depends on the seed.
+    :param kwargs: The other arguments of run, which are the same as for the
+        golden world, so they are only used to find the same world created
+        before.
+    :return: The path to the created world folder, as the generator's return
+        value.
+    """
+    # Randomizers use the world seed, so the clone needs its own
+    seeded = [d for d in datapacks or [] if isinstance(d, jd.JarDatapack)]
+    if seeded and merge_datapacks:
+        raise ValueError("Worlds with merged randomizer datapacks can't be "
+                         "cloned")
+    wc = world_creator.WorldCreator(
+        mc_release=version,
+        world_name=world_name,
+        seed=seed
     )
-    cu.change_directory(owd)
-    yield
+    # The same inputs as run, with its defaults for the missing arguments
+    arguments = inspect.signature(run).bind(
+        version, world_name, seed, datapacks, minify=minify,
+        compresslevel=compresslevel, merge_datapacks=merge_datapacks,
+        **kwargs)
+    arguments.apply_defaults()
+    inputs = fingerprint = None
+    if arguments.arguments["reuse_existing"] and world_name and \
+            seed is not None and seed != "":
+        span, inputs, fingerprint = _find_existing_world(
+            wc, version, datapacks, {
+                k: v for k, v in arguments.arguments.items() if k not in (
+                    "version", "world_name", "seed", "datapacks",
+                    *TUNING_ARGUMENTS)
+            })
+        if span.args["existing"]:
+            yield span
+            return span.args["existing"]
+    cloner = _get_world_cloner(golden_dir, tuple(
+        f"datapacks/{os.path.basename(d.get_zip_path(''))}" for d in seeded))
+    with tu.Span("clone_world_files", "clone") as span:
+        span.args["path"] = wc.create_world_directory()
+        span.args["files"] = cloner.clone_files(wc.w_dir)
+    yield span
+    copies = [copy.copy(d) for d in seeded]
+    if copies:
+        with tu.Span("jar_pipeline", "datapack") as span:
+            span.args["files"] = jd.prepare_jar_datapacks(
+                copies, version, wc.seed)
+        yield span
+    created = []
+    for d in copies:
+        created.append(d.create_datapack_files(
+            wc.datapack_dir, seed=wc.seed, version=version, minify=minify,
+            compresslevel=compresslevel))
+        yield from d.spans
+    with tu.Span("level_dat.patch", "level_dat") as span:
+        span.args["bytes_written"] = cloner.save_level_dat(wc)
+        if fingerprint and all(created):
+            world_index.register_world(wc.w_dir, fingerprint, inputs)
+    yield span
+    return wc.w_dir
+
+
+def _run_to_completion(execution: Generator[tu.Span, None, str],
+                       spans: List[tu.Span] = None) -> str:
+    """ Run a core execution, collecting its spans in an optional list. """
+    while True:
+        try:
+            span = next(execution)
+        except StopIteration as stop:
+            return stop.value
+        if spans is not None:
+            spans.append(span)
+
+
+def create_world(*args, spans: List[tu.Span] = None, **kwargs) -> str:
+    """ Create a minecraft world without reporting the progress.
+
+    Runs the whole core execution in a single call. Accepts the same arguments
+    as the run function.
+
+    :param spans: An optional list that receives the span of every stage.
+    :return: The path to the created world folder.
+    """
+    return _run_to_completion(run(*args, **kwargs), spans)
+
+
+def create_world_clone(*args, spans: List[tu.Span] = None, **kwargs) -> str:
+    """ Create a copy of a golden world without reporting the progress.
+
+    Accepts the same arguments as the clone function.
+
+    :param spans: An optional list that receives the span of every stage.
+    :return: The path to the created world folder.
+    """
+    return _run_to_completion(clone(*args, **kwargs), spans)
+
+
+def create_worlds(worlds: List[dict], max_workers: int = None) -> List[str]:
+    """ Create several minecraft worlds at the same time in this process.
+
+    The worlds are created on a pool of threads. Nothing depends on the
+    working directory, so the worlds do not interfere with each other.
+
+    :param worlds: The keyword arguments of the run function for every world.
+    :param max_workers: The maximum amount of worlds created at the same time.
+        Defaults to the thread pool default.
+    :return: The path to every created world folder, in the same order. Stops
+        with the exception of the first world that fails.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda w: create_world(**w), worlds))
+
+
+def create_world_clones(worlds: List[dict], max_workers: int = None,
+                        **kwargs) -> List[str]:
+    """ Create several minecraft worlds that only differ in name and seed.
+
+    The first world is created as the golden world, and the others are
+    created as its clones at the same time on a pool of threads.
+
+    :param worlds: The world_name and seed of every world.
+    :param max_workers: The maximum amount of worlds cloned at the same time.
+        Defaults to the thread pool default.
+    :param kwargs: The other arguments of the run function, the same for
+        every world.
+    :return: The path to every created world folder, in the same order. Stops
+        with the exception of the first world that fails.
+    """
+    datapacks = kwargs.get("datapacks") or []
+    if kwargs.get("merge_datapacks") and any(
+            isinstance(d, jd.JarDatapack) for d in datapacks):
+        raise ValueError("Worlds with merged randomizer datapacks can't be "
+                         "cloned")
+    golden_dir = create_world(**worlds[0], **kwargs)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return [golden_dir] + list(executor.map(
+            lambda w: create_world_clone(golden_dir, **w, **kwargs),
+            worlds[1:]))
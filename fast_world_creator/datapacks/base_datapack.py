@@ -1,4 +1,9 @@
 import logging
+import os
+from typing import List, Optional
+
+from fast_world_creator.utils import minify_utils as mnu
+from fast_world_creator.utils import trace_utils as tu
 
 
 class Datapack:
@@ -9,18 +14,70 @@ class Datapack:
         self.description = str()
         self.datapack_files = list()
         self.default_enabled = True
+        # Spans of the stages of the last call to create_datapack_files
+        self.spans: List[tu.Span] = list()
+
+    def create_datapack_files(self, datapack_dir: str, *args,
+                              minify: bool = False, compresslevel: int = None,
+                              **kwargs) -> bool:
+        """ Create the necessary files and store the datapack as a file.
+
+        The create, store and minify stages are timed, and their spans are
+        available in the spans attribute afterwards.
+
+        Datapack objects keep the state of the last datapack created, so a
+        copy of the object must be used to create several worlds at the same
+        time.
 
-    def create_datapack_files(self, *args, **kwargs) -> bool:
-        """ Create the necessary files and store the datapack as a file. """
+        :param datapack_dir: The datapacks folder of the world.
+        :param minify: Whether to minify the JSON and function files of the
+            stored datapack, which makes it smaller and faster to load.
+        :param compresslevel: The zlib compression level of the minified
+            datapack. Defaults to the zlib default.
+        """
         logging.info(f"Creating files for datapack '{self.name}'")
-        if self._create_datapack_files(*args, **kwargs):
+        self.spans = list()
+        with tu.Span(f"{self.name}.create", "datapack") as create_span:
+            self.spans.append(create_span)
+            created = self._create_datapack_files(*args, **kwargs)
+        if created:
             logging.info(f"Storing files for datapack '{self.name}'")
-            self.store()
+            with tu.Span(f"{self.name}.store", "datapack") as store_span:
+                self.spans.append(store_span)
+                self.store(datapack_dir)
+            zip_path = self.get_zip_path(datapack_dir)
+            if not os.path.isfile(zip_path):
+                return True
+            store_span.args["bytes_written"], store_span.args["entries"] = \
+                tu.get_zip_stats(zip_path)
+            if minify:
+                with tu.Span(f"{self.name}.minify", "datapack") as minify_span:
+                    self.spans.append(minify_span)
+                    minify_span.args["bytes_saved"] = mnu.minify_datapack(
+                        zip_path, compresslevel)
             return True
 
+    def get_fingerprint(self, version: str, seed: int = None) \
+            -> Optional[str]:
+        """ Identify the contents of the datapack created for a world.
+
+        :param version: The version of Minecraft of the world.
+        :param seed: The seed of the world.
+        :return: A digest that changes whenever the created datapack would,
+            or None if it can't be known without creating the datapack.
+        """
+        return None
+
+    def get_zip_path(self, datapack_dir: str) -> str:
+        """ Get the path of the datapack zip in a datapacks folder. """
+        return f"{datapack_dir}/{self.name}.zip"
+
     def _create_datapack_files(self, *args, **kwargs) -> bool:
         """ Abstract method to create the necessary datapack files. """
         return True
 
-    def store(self) -> None:
-        """ Abstract method to store the datapack as a zip file. """
+    def store(self, datapack_dir: str) -> None:
+        """ Abstract method to store the datapack as a zip file.
+
+        :param datapack_dir: The datapacks folder of the world.
+        """
@@ -1,17 +1,65 @@
+import json
+import logging
 import os
-import shutil
+from typing import Union
+from zipfile import ZipFile, BadZipFile
 
 from fast_world_creator.datapacks.base_datapack import Datapack
+from fast_world_creator.utils import cache_utils
+
+DEFAULT_DESCRIPTION = "Found in assets/datapacks"
 
 
 class ExternalDatapack(Datapack):
 
-    def __init__(self, path):
+    def __init__(self, path, description: str = None, pack_format: int = None):
         super().__init__()
-        self.name = path.split("/")[-1].rstrip(".zip")
+        self.name = os.path.basename(path)[:-len(".zip")]
         self.path = path
-        self.description = "Found in assets/datapacks"
+        self.description = description or DEFAULT_DESCRIPTION
+        self.pack_format = pack_format
+
+    def store(self, datapack_dir: str) -> None:
+        """ Link the existing datapack zip into the datapacks folder.
+
+        The zip is added to the artifact store once, and every world receives
+        a hardlink (or a copy, if linking is not possible) of the stored zip.
+        """
+        cache_utils.link_file(cache_utils.store_artifact(self.path),
+                              self.get_zip_path(datapack_dir))
+
+    def get_fingerprint(self, version: str, seed: int = None) -> str:
+        """ The digest of the zip, which is the same for every world. """
+        return cache_utils.get_file_digest(self.path)
+
+    def get_zip_path(self, datapack_dir: str) -> str:
+        return f"{datapack_dir}/{os.path.basename(self.path)}"
+
+
+def read_pack_metadata(path: str) -> dict:
+    """ Read the description and pack format of a datapack zip.
+
+    Only the pack.mcmeta entry of the zip is read.
+
+    :param path: The path to the datapack zip.
+    :return: A dictionary with the description and pack_format, which are
+        None if the zip has no valid pack.mcmeta.
+    """
+    try:
+        with ZipFile(path) as zip_file:
+            pack = json.loads(zip_file.read("pack.mcmeta"))["pack"]
+        return {"description": _get_plain_text(pack.get("description", "")),
+                "pack_format": pack.get("pack_format")}
+    except (OSError, KeyError, ValueError, TypeError, BadZipFile) as e:
+        logging.warning(f"Can't read pack.mcmeta of '{path}': {e}")
+        return {"description": None, "pack_format": None}
+
 
-    def store(self) -> None:
-        """ Copy the existing datapack zip to the datapacks folder."""
-        shutil.copy(self.path, f"{os.getcwd()}/datapacks/")
+def _get_plain_text(component: Union[str, list, dict]) -> str:
+    """ Get the text of a (possibly formatted) Minecraft text component. """
+    if isinstance(component, list):
+        return "".join(_get_plain_text(c) for c in component)
+    if isinstance(component, dict):
+        return _get_plain_text(component.get("text", "")) + "".join(
+            _get_plain_text(c) for c in component.get("extra", []))
+    return str(component)
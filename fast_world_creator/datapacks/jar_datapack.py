@@ -0,0 +1,319 @@
+import hashlib as hl
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from zipfile import ZipFile, ZIP_DEFLATED
+
+from fast_world_creator.datapacks.base_datapack import Datapack
+from fast_world_creator.utils import cache_utils
+from fast_world_creator.utils import common_utils as cu
+from fast_world_creator.utils import jar_index
+from fast_world_creator.utils import zip_utils as zu
+
+# (path in the datapack, path in the jar, change) of a generated datapack
+# file. The jar file is copied as it is if the change is None, or passed to
+# _apply with the change otherwise.
+DatapackRecord = Tuple[str, str, Any]
+
+
+class JarDatapack(Datapack):
+    """ Base class of the datapacks generated from the files of a client jar.
+
+    Subclasses set the path prefix of the jar files they use and implement
+    _randomize. The files are listed by read_jar_entries, which reads the jar
+    once for every jar datapack of a world that needs the contents of its
+    files, and only keeps what _collect returns for every file. The files
+    themselves are read again from the jar while the zip is written, so the
+    files of a datapack are never all held in memory.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.default_enabled = False
+        # Path prefix of the jar files used by the datapack
+        self.prefix = str()
+        # Whether _randomize needs the decompressed files, through _collect.
+        # Otherwise, only the paths of the files are used.
+        self.needs_contents = False
+        # Index of the client jar of the selected version
+        self.jar_index = None
+        # Jar files under the prefix, in the order they are stored, with what
+        # _collect kept of their contents
+        self.files: Optional[Dict[str, Any]] = None
+        # Files generated by _randomize
+        self.output: List[DatapackRecord] = list()
+        # Version and seed the datapack was prepared for
+        self.prepared = None
+        # Key and path of the generated zip in the artifact store
+        self.artifact_key = None
+        self.artifact_path = None
+
+    def prepare(self, version: str, seed: int = None) -> bool:
+        """ Find the jar of a version and look the datapack up in the store.
+
+        :param version: The version of Minecraft to use as base (e.g. '1.15.2').
+        :param seed: The seed to use for the randomization.
+        :return: False if the version is not installed.
+        """
+        if self.prepared == (version, seed):
+            return True
+        # The same object is reused for every world created in the process
+        self.datapack_files = [self._get_pack_mcmeta()]
+        self.files = None
+        self.output = list()
+        jar_path = cu.find_installed_minecraft_versions().get(version, None)
+        if not jar_path:
+            logging.error(f"{version} is not installed. Can't create "
+                          f"'{self.name}'.")
+            return False
+        self.jar_index = jar_index.get_jar_index(jar_path)
+        self.artifact_key = self._get_artifact_key(seed)
+        self.artifact_path = self.artifact_key and cache_utils.get_artifact(
+            self.artifact_key)
+        self.prepared = (version, seed)
+        return True
+
+    def needs_files(self) -> bool:
+        """ Whether the jar files have to be listed to create the datapack. """
+        return self.files is None and not self.artifact_path
+
+    def _create_datapack_files(self, version: str, seed: int = None, *args,
+                               **kwargs) -> bool:
+        """ Create the necessary datapack files.
+
+        :param version: The version of Minecraft to use as base (e.g. '1.15.2').
+        :param seed: The seed to use for the randomization.
+        :return: True if the files were created successfully.
+        """
+        if not self.prepare(version, seed):
+            return False
+        self.prepared = None
+        if self.artifact_path:
+            # Already generated for this version and seed, nothing to do
+            return True
+        if self.files is None:
+            read_jar_entries(self.jar_index, [self])
+        self.output = self._randomize(self.files, seed)
+        return True
+
+    def _collect(self, name: str, contents: bytes) -> Any:
+        """ Keep what _randomize needs of a jar file.
+
+        Called for every file under the prefix, as the jar is read, if
+        needs_contents is True. The contents are dropped once it returns.
+
+        :param name: The path of the file in the jar.
+        :param contents: The decompressed contents of the file.
+        :return: The value to keep for the file.
+        """
+        return None
+
+    def _randomize(self, files: Dict[str, Any], seed: int = None) \
+            -> List[DatapackRecord]:
+        """ Abstract method to create the datapack files from the jar files.
+
+        Must not modify the datapack, so it can run for several seeds at the
+        same time.
+
+        :param files: The jar files under the prefix, in the order they are
+            stored in the jar, with what _collect kept of them.
+        :param seed: The seed to use for the randomization.
+        :return: The files of the datapack.
+        """
+        return list()
+
+    def _apply(self, contents: bytes, change: Any) -> str:
+        """ Create the contents of a datapack file from its jar file.
+
+        :param contents: The decompressed contents of the jar file.
+        :param change: The change returned by _randomize for the file.
+        :return: The contents of the datapack file.
+        """
+        return contents.decode("utf-8")
+
+    def _get_artifact_key(self, seed: int = None) -> Optional[str]:
+        """ Create the artifact store key for a version and seed.
+
+        Depends on the jar index (which is keyed by the jar) and the datapack
+        metadata, so any change to the inputs creates a new key.
+
+        :param seed: The seed to use for the randomization.
+        :return: The key or None if the seed is random, as the result would
+            not be reproducible.
+        """
+        if seed is None:
+            return None
+        key = "|".join([self.name, self.jar_index.key, str(seed),
+                        self.datapack_files[0]["data"]])
+        return hl.sha1(key.encode("utf-8")).hexdigest()
+
+    def get_fingerprint(self, version: str, seed: int = None) \
+            -> Optional[str]:
+        """ Identify the datapack by the client jar, the seed and the metadata.
+
+        :return: The digest, or None if the seed is random or the version is
+            not installed.
+        """
+        jar_path = cu.find_installed_minecraft_versions().get(version, None)
+        if seed is None or not jar_path:
+            return None
+        key = "|".join([self.name, cache_utils.get_file_digest(jar_path),
+                        str(seed), self._get_pack_mcmeta()["data"]])
+        return hl.sha1(key.encode("utf-8")).hexdigest()
+
+    def _get_pack_mcmeta(self) -> dict:
+        """ Create the pack.mcmeta file of the datapack. """
+        return {
+            "path": 'pack.mcmeta',
+            "data": json.dumps(
+                {
+                    "pack": {
+                        "pack_format": 5,
+                        "description": f"{self.description}"
+                    }
+                },
+                indent=4
+            )
+        }
+
+    def store(self, datapack_dir: str) -> None:
+        """ Store the datapack as a zip file.
+
+        The jar files are read while the zip is written. Those copied as they
+        are keep their compressed records, so they are neither decompressed
+        nor compressed again. Zips generated before for the same version and
+        seed are linked from the artifact store instead.
+
+        :param datapack_dir: The datapacks folder of the world.
+        """
+        zip_path = self.get_zip_path(datapack_dir)
+        if self.artifact_path:
+            cache_utils.link_file(self.artifact_path, zip_path)
+            return
+        self._write_zip(zip_path, self.output)
+        if self.artifact_key:
+            cache_utils.store_artifact(zip_path, self.artifact_key)
+
+    def _write_zip(self, zip_path: str, output: List[DatapackRecord]) -> None:
+        raw_copies = 0
+        with ZipFile(zip_path, 'w', ZIP_DEFLATED, False) as zip_f, \
+                self.jar_index.open() as jar:
+            for file in self.datapack_files:
+                zip_f.writestr(
+                    zinfo_or_arcname=file["path"],
+                    data=file["data"]
+                )
+            # Decompressed ahead on a pool of threads, and dropped once written
+            changed = jar.read_many(
+                [source for _, source, change in output if change is not None])
+            for path, source, change in output:
+                info = self.jar_index.get_info(source)
+                if change is not None:
+                    zip_f.writestr(path, self._apply(next(changed)[1], change))
+                elif zu.can_copy_raw(info):
+                    zu.write_raw_entry(zip_f, path, info, jar.read_raw(source))
+                    raw_copies += 1
+                else:
+                    zip_f.writestr(path, jar.read(source))
+        if raw_copies:
+            logging.info(f"Copied {raw_copies}/{len(output)} '{self.name}' "
+                         f"files without recompression")
+
+    def create_seed_variants(self, version: str, seeds: List[int],
+                             output_folder: str, max_workers: int = None) \
+            -> Dict[int, str]:
+        """ Create one datapack zip per seed in a single jar pass.
+
+        The jar files are listed (and collected, if the datapack needs their
+        contents) once, then the zips are written in parallel. Every zip is
+        equivalent to the one created for a world with the same seed.
+
+        :param version: The version of Minecraft to use as base (e.g. '1.15.2').
+        :param seeds: The seeds to create a datapack for.
+        :param output_folder: The folder to store the zips in, which are named
+            '<name>_<seed>.zip'.
+        :param max_workers: The maximum amount of zips written at the same
+            time. Defaults to the amount of CPUs in the system.
+        :return: A dictionary mapping every seed to the path of its zip.
+        """
+        if not self.prepare(version):
+            return {}
+        self.prepared = None
+        logging.info(f"Loading {version} files of '{self.name}' for "
+                     f"{len(seeds)} seed(s)")
+        read_jar_entries(self.jar_index, [self])
+        os.makedirs(output_folder, exist_ok=True)
+
+        def write_variant(seed: int) -> str:
+            zip_path = f"{output_folder}/{self.name}_{seed}.zip"
+            self._write_zip(zip_path, self._randomize(self.files, seed))
+            return zip_path
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            zip_paths = list(executor.map(write_variant, seeds))
+        logging.info(f"Created {len(zip_paths)} {self.name} variant(s)")
+        return dict(zip(seeds, zip_paths))
+
+
+def read_jar_entries(index: jar_index.JarIndex,
+                     datapacks: List[JarDatapack],
+                     max_workers: int = None,
+                     max_in_flight_bytes: int = None) -> None:
+    """ Collect the jar files of several jar datapacks in a single pass.
+
+    The files under the prefix of every datapack are listed from the index.
+    The files of the datapacks that need their contents are read once, in
+    the order they are stored in the jar, decompressed on a pool of threads
+    and handed to _collect of every datapack whose prefix matches. Only what
+    _collect returns is kept, so the decompressed files held at any time are
+    bounded by the in-flight budget. The files attribute of every datapack
+    is set.
+
+    :param index: The index of the jar, shared by all the datapacks.
+    :param datapacks: The datapacks to collect the files of.
+    :param max_workers: The maximum amount of files decompressed at the same
+        time. Defaults to jar_index.DECOMPRESS_WORKERS.
+    :param max_in_flight_bytes: The maximum decompressed bytes read ahead.
+        Defaults to jar_index.MAX_IN_FLIGHT_BYTES.
+    """
+    for d in datapacks:
+        d.files = dict.fromkeys(index.get_names(d.prefix))
+    readers = [d for d in datapacks if d.needs_contents]
+    names = sorted(
+        {name for d in readers for name in d.files},
+        key=lambda n: index.entries[n][jar_index.DATA_OFFSET])
+    if not names:
+        return
+    logging.info(f"Reading {len(names)} files of '{index.jar_path}' for "
+                 f"{', '.join(d.name for d in readers)}")
+    with index.open() as jar:
+        for name, contents in jar.read_many(
+                names, max_workers, max_in_flight_bytes):
+            for d in readers:
+                if name in d.files:
+                    d.files[name] = d._collect(name, contents)
+
+
+def prepare_jar_datapacks(datapacks: List[Datapack], version: str,
+                          seed: int = None) -> int:
+    """ Read the jar files of all the jar datapacks of a world at once.
+
+    Datapacks that are already in the artifact store are skipped, as their
+    files are not needed.
+
+    :param datapacks: The datapacks of the world. Other datapacks are ignored.
+    :param version: The version of Minecraft to use as base (e.g. '1.15.2').
+    :param seed: The seed of the world.
+    :return: The amount of jar files used by the datapacks.
+    """
+    jar_datapacks = [
+        d for d in datapacks if isinstance(d, JarDatapack)
+        and d.prepare(version, seed) and d.needs_files()
+    ]
+    if not jar_datapacks:
+        return 0
+    index = jar_datapacks[0].jar_index
+    read_jar_entries(index, jar_datapacks)
+    return len({name for d in jar_datapacks for name in d.files})
@@ -0,0 +1,69 @@
+import json
+import logging
+import random
+from typing import Dict, List, Optional, Tuple
+
+from fast_world_creator.datapacks.jar_datapack import JarDatapack, \
+    DatapackRecord
+
+# Criteria and requirements of an advancement, which are shuffled together
+Criteria = Tuple[dict, Optional[list]]
+
+ADVANCEMENT_PREFIX = "data/minecraft/advancements"
+# Hidden advancements that unlock recipes, which are not randomized
+RECIPE_ADVANCEMENT_PREFIX = f"{ADVANCEMENT_PREFIX}/recipes/"
+
+
+class RandomAdvancementsDataPack(JarDatapack):
+
+    def __init__(self):
+        super().__init__()
+        self.name = "random_advancements"
+        self.description = "Advancement criteria randomizer"
+        self.prefix = ADVANCEMENT_PREFIX
+        self.needs_contents = True
+
+    def _collect(self, name: str, contents: bytes) -> Optional[Criteria]:
+        """ Keep the criteria and requirements of an advancement.
+
+        :return: The criteria and requirements, or None for the recipe
+            advancements and those without criteria.
+        """
+        if name.startswith(RECIPE_ADVANCEMENT_PREFIX):
+            return None
+        try:
+            advancement = json.loads(contents)
+        except ValueError:
+            return None
+        if not isinstance(advancement, dict) or "criteria" not in advancement:
+            return None
+        return advancement["criteria"], advancement.get("requirements")
+
+    def _randomize(self, files: Dict[str, Optional[Criteria]],
+                   seed: int = None) -> List[DatapackRecord]:
+        """ Randomize the criteria of the advancements.
+
+        The criteria of every advancement, together with its requirements,
+        are shuffled using the provided seed. The advancements keep their
+        display, parent and rewards, so the advancement tree stays the same
+        but every advancement is granted by a different achievement.
+
+        :param files: The advancements in the jar, with their criteria.
+        :param seed: The seed to use for randomization of the advancements.
+        :return: The advancements with their new criteria as the change.
+        """
+        paths = [path for path, criteria in files.items() if criteria]
+        criteria = [files[path] for path in paths]
+        logging.info(
+            f"Randomizing {len(criteria)} advancements with seed = {seed}")
+        random.Random(seed).shuffle(criteria)
+        return [(path, path, c) for path, c in zip(paths, criteria)]
+
+    def _apply(self, contents: bytes, change: Criteria) -> str:
+        """ Replace the criteria and requirements of an advancement. """
+        criterion, requirements = change
+        advancement = dict(json.loads(contents), criteria=criterion)
+        advancement.pop("requirements", None)
+        if requirements is not None:
+            advancement["requirements"] = requirements
+        return json.dumps(advancement)
@@ -0,0 +1,70 @@
+import json
+import logging
+import random
+from typing import Dict, List, Optional
+
+from fast_world_creator.datapacks.jar_datapack import JarDatapack, \
+    DatapackRecord
+
+RECIPE_PREFIX = "data/minecraft/recipes"
+
+
+class RandomRecipesDataPack(JarDatapack):
+
+    def __init__(self):
+        super().__init__()
+        self.name = "random_recipes"
+        self.description = "Recipe result randomizer"
+        self.prefix = RECIPE_PREFIX
+        self.needs_contents = True
+
+    def _collect(self, name: str, contents: bytes) -> Optional[str]:
+        """ Keep the item id of the result of a recipe.
+
+        :return: The item id, or None if the recipe has no result item
+            (e.g. special crafting recipes) or can't be read.
+        """
+        try:
+            return _get_result_item(json.loads(contents))
+        except ValueError:
+            return None
+
+    def _randomize(self, files: Dict[str, Optional[str]],
+                   seed: int = None) -> List[DatapackRecord]:
+        """ Randomize the results of the recipes.
+
+        The result items of every recipe are shuffled using the provided
+        seed. Every recipe keeps its ingredients, its result count and the
+        format of its result, so only the crafted item changes. Recipes
+        without a result item (e.g. special crafting recipes) are left out.
+
+        :param files: The recipes in the jar, with their result item.
+        :param seed: The seed to use for randomization of the recipes.
+        :return: The recipes with their new result item as the change.
+        """
+        paths = [path for path, item in files.items() if item]
+        items = [files[path] for path in paths]
+        logging.info(f"Randomizing {len(items)} recipes with seed = {seed}")
+        random.Random(seed).shuffle(items)
+        return [(path, path, item) for path, item in zip(paths, items)]
+
+    def _apply(self, contents: bytes, change: str) -> str:
+        """ Replace the result item of a recipe. """
+        recipe = json.loads(contents)
+        if isinstance(recipe["result"], dict):
+            recipe["result"]["item"] = change
+        else:
+            recipe["result"] = change
+        return json.dumps(recipe)
+
+
+def _get_result_item(recipe: dict) -> str:
+    """ Get the item id of the result of a recipe, or None if it has none.
+
+    Crafting recipes store the result as an object with an item id and a
+    count, while cooking and stonecutting recipes store the item id alone.
+    """
+    result = recipe.get("result") if isinstance(recipe, dict) else None
+    if isinstance(result, dict):
+        result = result.get("item")
+    return result if isinstance(result, str) else None
@@ -0,0 +1,185 @@
+""" Headless editing of the level.dat of existing Minecraft worlds.
+
+Usage: python -m fast_world_creator.edit changes.json [world ...] [--all]
+                                         [--dry-run] [--processes N]
+                                         [--threads]
+                                         [--report report.json]
+
+The changes file is a JSON object with the optional keys 'gamerules',
+'border_settings', 'raining' and 'thundering', which accept the same values
+as the world specifications of the batch manifest. Only the given values are
+changed, so 'gamerules' and 'border_settings' only need the values to change:
+
+    {"gamerules": {"keepInventory": true}, "border_settings": {"size": 1000}}
+
+The worlds are world folders, or names of worlds in the saves folder. With
+--all, every world of the saves folder is edited. With --dry-run, the changes
+are printed without writing them.
+
+This module never imports the graphical interface.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List
+
+from fast_world_creator.new_world import level_editor
+from fast_world_creator.utils import common_utils as cu
+
+CHANGE_OPTIONS = ("gamerules", "border_settings", "raining", "thundering")
+
+
+def load_changes(changes_path: str) -> Dict[str, object]:
+    """ Read the changes to apply from a JSON file.
+
+    :param changes_path: The path to the JSON changes file.
+    :return: The new value of every level.dat entry to change.
+    """
+    logging.info(f"Reading changes '{changes_path}'")
+    with open(changes_path, "r") as f:
+        options = json.load(f)
+    unknown = set(options) - set(CHANGE_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown options in '{changes_path}': "
+                         f"{sorted(unknown)}")
+    return level_editor.get_level_dat_changes(**options)
+
+
+def resolve_world(world: str) -> str:
+    """ Get the folder of a world given by folder or by name. """
+    if os.path.isdir(world):
+        return world
+    return f"{cu.MC_FOLDER}/saves/{world}"
+
+
+def edit_world(w_dir: str, changes: Dict[str, object],
+               dry_run: bool = False) -> dict:
+    """ Edit the level.dat of a single world and report the outcome.
+
+    Never raises, so a failing world does not stop the rest of the worlds.
+
+    :param w_dir: The world folder.
+    :param changes: The changes, as returned by
+        level_editor.get_level_dat_changes.
+    :param dry_run: Whether to only find the changes, without writing them.
+    :return: A dictionary with the world path, success flag, error message,
+        the old and new value of every entry changed and the elapsed seconds.
+    """
+    result = {
+        "path": w_dir,
+        "success": False,
+        "error": None,
+        "changes": {}
+    }
+    start = time.perf_counter()
+    try:
+        result["changes"] = level_editor.edit_level_dat(
+            w_dir, changes, dry_run)
+        result["success"] = True
+    except Exception as e:
+        logging.exception(f"Failed to edit world '{w_dir}'")
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def run_edit(world_dirs: List[str], changes: Dict[str, object],
+             dry_run: bool = False, processes: int = None,
+             threads: bool = False) -> dict:
+    """ Edit the level.dat of many worlds on a pool of processes.
+
+    :param world_dirs: The world folders.
+    :param changes: The changes, as returned by
+        level_editor.get_level_dat_changes.
+    :param dry_run: Whether to only find the changes, without writing them.
+    :param processes: The amount of worker processes. Defaults to the amount
+        of CPUs in the system.
+    :param threads: Whether to use threads of this process instead of worker
+        processes, which avoids starting a process per worker.
+    :return: A dictionary containing the per-world results in the order of
+        the worlds, the total elapsed seconds and the throughput in worlds per
+        second.
+    """
+    processes = processes or os.cpu_count() or 1
+    executor_type = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    logging.info(f"Editing {len(world_dirs)} world(s) with {processes} "
+                 f"{'thread(s)' if threads else 'process(es)'}")
+    start = time.perf_counter()
+    with executor_type(max_workers=processes) as executor:
+        results = list(executor.map(
+            partial(edit_world, changes=changes, dry_run=dry_run),
+            world_dirs))
+    elapsed = time.perf_counter() - start
+    edited = sum(1 for r in results if r["success"])
+    throughput = edited / elapsed if elapsed else 0.0
+    logging.info(f"Edited {edited}/{len(world_dirs)} world(s) in "
+                 f"{elapsed:.2f}s ({throughput:.2f} worlds/s)")
+    return {
+        "results": results,
+        "edited": edited,
+        "changed": sum(1 for r in results if r["changes"]),
+        "failed": len(world_dirs) - edited,
+        "elapsed": elapsed,
+        "worlds_per_second": throughput
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m fast_world_creator.edit",
+        description="Change the gamerules, world border or weather of "
+                    "existing Minecraft worlds.")
+    parser.add_argument("changes", help="Path to the JSON changes file")
+    parser.add_argument("worlds", nargs="*",
+                        help="World folders or names of worlds in the saves "
+                             "folder")
+    parser.add_argument("-a", "--all", action="store_true",
+                        help="Edit every world of the saves folder")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="Print the changes without writing them")
+    parser.add_argument("-p", "--processes", type=int, default=None,
+                        help="Amount of worker processes (default: CPU count)")
+    parser.add_argument("--threads", action="store_true",
+                        help="Use threads of a single process as workers")
+    parser.add_argument("-r", "--report", default=None,
+                        help="Write the full results to this JSON file")
+    args = parser.parse_args(argv)
+    if not args.worlds and not args.all:
+        parser.error("no worlds given, use --all to edit every world")
+
+    config = cu.get_or_create_config()
+    log_format = "[%(asctime)s] [%(levelname)s] %(module)s - %(message)s"
+    logging.basicConfig(filename=config.get("LOGGING", "file"), filemode="w",
+                        format=log_format, level=logging.getLevelName(
+                            config.get("LOGGING", "level") or "INFO"))
+
+    changes = load_changes(args.changes)
+    world_dirs = [resolve_world(w) for w in args.worlds]
+    if args.all:
+        world_dirs += level_editor.get_saved_worlds(f"{cu.MC_FOLDER}/saves")
+    # The same world edited twice at the same time would lose a change
+    world_dirs = list(dict.fromkeys(os.path.normpath(w) for w in world_dirs))
+    summary = run_edit(world_dirs, changes, args.dry_run, args.processes,
+                       threads=args.threads)
+    for r in summary["results"]:
+        status = "OK" if r["success"] else f"FAILED ({r['error']})"
+        print(f"{r['elapsed']:8.3f}s  {r['path']}: {status}")
+        for key, (old, new) in r["changes"].items():
+            print(f"{'':10}{key}: {old!r} -> {new!r}")
+    action = "Would change" if args.dry_run else "Changed"
+    print(f"{action} {summary['changed']}/{len(summary['results'])} world(s) "
+          f"in {summary['elapsed']:.2f}s ({summary['worlds_per_second']:.2f} "
+          f"worlds/s)")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(summary, f, indent=4)
+    return 0 if not summary["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import io
 import json
+from functools import lru_cache
+from typing import Dict, Tuple
 
 from nbtlib import tag, schema, nbt, parse_nbt
 
@@ -82,6 +85,7 @@ generator_options_dict = {
         }),
         'type': tag.String
     }),
+    'biome': tag.String,
     'structures': tag.Compound,
     'layers': tag.List[schema('layers', {
         'block': tag.String,
@@ -174,3 +178,159 @@ class LevelFile(nbt.File, LevelFileSchema):
         level_file = LevelFile(parse_nbt("{'':{Data:{}}}"))
         level_file.data = LevelDataSchema(parse_nbt(json.dumps(default_data)))
         return level_file
+
+
+# Root compound named '' holding the compound named 'Data'
+LEVEL_DAT_HEADER = b"\x0a\x00\x00\x0a\x00\x04Data"
+# End of the 'Data' compound and the root compound
+LEVEL_DAT_FOOTER = b"\x00\x00"
+# Tag types that can be built straight from python values
+SCALAR_TAGS = (tag.Byte, tag.Int, tag.Long, tag.Double, tag.String)
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def json_to_nbt(value) -> tag.Base:
+    """ Convert a python value like parse_nbt(json.dumps(value)) would.
+
+    Containers and the common scalars are converted directly, which avoids
+    tokenizing the literal. Everything else goes through the literal parser.
+
+    :param value: A JSON serializable python value.
+    :return: The equivalent untyped NBT tag.
+    """
+    if isinstance(value, dict):
+        return tag.Compound(
+            {str(k): json_to_nbt(v) for k, v in value.items()})
+    elif isinstance(value, (list, tuple)):
+        return tag.List([json_to_nbt(v) for v in value])
+    elif isinstance(value, bool):
+        return tag.Byte(value)
+    elif isinstance(value, str):
+        return tag.String(value)
+    elif value is None:
+        return tag.String("null")
+    elif isinstance(value, int) and INT_MIN <= value <= INT_MAX:
+        return tag.Int(value)
+    # Large integers and exponent floats become strings in the literal
+    return parse_nbt(json.dumps(value))
+
+
+def cast_level_data_value(key: str, value) -> tag.Base:
+    """ Convert a python value into the tag of a level data entry.
+
+    The value is cast exactly like LevelDataSchema casts it in the
+    from_arguments path, without the JSON and NBT literal round trip.
+
+    :param key: The name of the entry (e.g. 'LevelName').
+    :param value: The python value of the entry.
+    :return: The tag of the entry, with the type of the schema.
+    """
+    schema_type = LevelDataSchema.schema.get(key)
+    if schema_type is None:
+        raise TypeError(f"Invalid key {key!r}")
+    if schema_type in SCALAR_TAGS and isinstance(value, (int, float, str)):
+        return schema_type(value)
+    return LevelDataSchema().cast_item(key, json_to_nbt(value))
+
+
+def encode_level_data_entry(key: str, value) -> bytes:
+    """ Encode a single named entry of the level data compound.
+
+    :param key: The name of the entry (e.g. 'LevelName').
+    :param value: The python value of the entry.
+    :return: The binary NBT of the entry: tag id, name and payload.
+    """
+    nbt_value = cast_level_data_value(key, value)
+    buff = io.BytesIO()
+    tag.write_numeric(tag.BYTE, nbt_value.tag_id, buff, "big")
+    tag.write_string(key, buff, "big")
+    nbt_value.write(buff, "big")
+    return buff.getvalue()
+
+
+class CompiledLevelDat:
+    """ level.dat serializer with the constant entries encoded in advance.
+
+    The level.dat of a new world is the template from get_template_dict
+    updated with the values of the world. Every entry that does not depend on
+    the world is encoded once, and encoding a world only encodes its own
+    values. The result is byte-identical to LevelFile.from_arguments.
+    """
+
+    def __init__(self, version: Dict, world_keys: Tuple[str, ...]):
+        """ Encode the constant entries of the template.
+
+        :param version: The 'Version' entry (data version 'Id' and 'Name').
+        :param world_keys: The keys of the entries that change per world.
+        """
+        template = get_template_dict()
+        template["Version"] = version
+        # Why Mojang?
+        template["DataVersion"] = version["Id"]
+        self.world_keys = tuple(k for k in world_keys if k not in (
+            "Version", "DataVersion"))
+        # Same order as updating the template with the world values
+        self.keys = list(template) + [
+            k for k in self.world_keys if k not in template]
+        self.constant_entries = {
+            k: encode_level_data_entry(k, v) for k, v in template.items()
+            if k not in self.world_keys
+        }
+
+    def encode(self, world_dict: dict) -> bytes:
+        """ Encode the uncompressed level.dat of a world.
+
+        :param world_dict: The values of the world, with the keys the
+            serializer was compiled for.
+        :return: The binary NBT payload of level.dat.
+        """
+        parts = [LEVEL_DAT_HEADER]
+        for key in self.keys:
+            if key in self.constant_entries:
+                parts.append(self.constant_entries[key])
+            else:
+                parts.append(encode_level_data_entry(key, world_dict[key]))
+        parts.append(LEVEL_DAT_FOOTER)
+        return b"".join(parts)
+
+
+def patch_level_dat(level_dat: bytes, old_values: dict,
+                    new_values: dict) -> bytes:
+    """ Replace some values of an encoded level.dat.
+
+    Every entry is encoded with its old and new value, and the old entry is
+    replaced in the NBT, so the rest of level.dat is not encoded again.
+
+    :param level_dat: The uncompressed NBT payload of level.dat.
+    :param old_values: The current values of the entries to replace.
+    :param new_values: The new values of the entries, with the same keys.
+    :return: The patched NBT payload.
+    """
+    for key, value in new_values.items():
+        old_entry = encode_level_data_entry(key, old_values[key])
+        if level_dat.count(old_entry) != 1:
+            raise ValueError(f"Can't find a single '{key}' entry to patch")
+        level_dat = level_dat.replace(
+            old_entry, encode_level_data_entry(key, value))
+    return level_dat
+
+
+@lru_cache(maxsize=32)
+def _compile_level_dat(version_id: int, version_name: str,
+                       world_keys: Tuple[str, ...]) -> CompiledLevelDat:
+    return CompiledLevelDat({"Id": version_id, "Name": version_name},
+                            world_keys)
+
+
+def get_compiled_level_dat(version: Dict, world_keys: Tuple[str, ...]) \
+        -> CompiledLevelDat:
+    """ Get the serializer for a data version and a set of world entries.
+
+    Serializers are compiled once and reused for every world of the same
+    version.
+
+    :param version: The 'Version' entry (data version 'Id' and 'Name').
+    :param world_keys: The keys of the entries that change per world.
+    :return: The compiled serializer.
+    """
+    return _compile_level_dat(version["Id"], version["Name"], world_keys)
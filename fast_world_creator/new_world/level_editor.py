@@ -0,0 +1,125 @@
+import logging
+import os
+from typing import Dict, List, Tuple
+
+from nbtlib import tag
+
+from fast_world_creator.new_world.level_dat import LevelFile, \
+    cast_level_data_value
+from fast_world_creator.utils import cache_utils
+from fast_world_creator.utils.level_dat_utils import BORDER_LEVEL_DATA, \
+    get_border_level_data
+
+# Prefix of the changes to single gamerules, which are merged into the
+# existing ones instead of replacing them all
+GAMERULE_PREFIX = "GameRules."
+
+
+def get_level_dat_changes(gamerules: dict = None,
+                          border_settings: dict = None,
+                          raining: bool = None,
+                          thundering: bool = None) -> Dict[str, object]:
+    """ Convert the options accepted by the core execution into changes.
+
+    Only the options that are given are changed, so the gamerules and world
+    border options only need the values to change.
+
+    :param gamerules: The gamerules to change and their values.
+    :param border_settings: The world border options to change, with the
+        keys of get_default_border_settings.
+    :param raining: Whether it should be raining in the world.
+    :param thundering: Whether it should be thundering in the world. Also
+        makes it rain if set to True.
+    :return: The new value of every level.dat entry, with the gamerules as
+        separate 'GameRules.<name>' entries.
+    """
+    changes = {}
+    for name, value in (gamerules or {}).items():
+        # Gamerules always stored as strings in level.dat
+        changes[f"{GAMERULE_PREFIX}{name}"] = str(value).lower()
+    border_settings = border_settings or {}
+    unknown = set(border_settings) - set(BORDER_LEVEL_DATA)
+    if unknown:
+        raise ValueError(f"Unknown world border options: {sorted(unknown)}")
+    changes.update(get_border_level_data(border_settings))
+    if thundering:
+        raining = True
+    if raining is not None:
+        changes["raining"] = int(raining)
+    if thundering is not None:
+        changes["thundering"] = int(thundering)
+    if raining:
+        # Otherwise the game keeps the weather clear until it runs out
+        changes["clearWeatherTime"] = 0
+    return changes
+
+
+def diff_level_data(data: tag.Compound, changes: Dict[str, object]) \
+        -> Dict[str, Tuple[object, object]]:
+    """ Find the changes that would modify the level data.
+
+    :param data: The 'Data' compound of a level.dat file.
+    :param changes: The changes, as returned by get_level_dat_changes.
+    :return: The old and new value of every entry that changes, None as the
+        old value if the entry is missing.
+    """
+    diff = {}
+    for key, value in changes.items():
+        if key.startswith(GAMERULE_PREFIX):
+            old = data.get("GameRules", {}).get(key[len(GAMERULE_PREFIX):])
+            new = tag.String(value)
+        else:
+            old = data.get(key)
+            new = cast_level_data_value(key, value)
+        if old is None or old.unpack() != new.unpack():
+            diff[key] = (None if old is None else old.unpack(), new.unpack())
+    return diff
+
+
+def edit_level_dat(w_dir: str, changes: Dict[str, object],
+                   dry_run: bool = False) -> Dict[str, Tuple[object, object]]:
+    """ Apply changes to the level.dat of an existing world.
+
+    The new level.dat is written next to the old one and moved over it, so
+    the world never has a partially written level.dat. The previous version
+    is kept as level.dat_old, like the game does.
+
+    :param w_dir: The world folder.
+    :param changes: The changes, as returned by get_level_dat_changes.
+    :param dry_run: Whether to only find the changes, without writing them.
+    :return: The old and new value of every entry that changed.
+    """
+    level_dat_path = f"{w_dir}/level.dat"
+    level_file = LevelFile.load(level_dat_path)
+    data = level_file.data
+    diff = diff_level_data(data, changes)
+    if dry_run or not diff:
+        return diff
+    for key in diff:
+        if key.startswith(GAMERULE_PREFIX):
+            data.setdefault("GameRules", tag.Compound())[
+                key[len(GAMERULE_PREFIX):]] = tag.String(changes[key])
+        else:
+            data[key] = cast_level_data_value(key, changes[key])
+    tmp_path = f"{level_dat_path}.tmp"
+    level_file.save(tmp_path)
+    old_tmp_path = f"{w_dir}/level.dat_old.tmp"
+    if os.path.exists(old_tmp_path):
+        os.remove(old_tmp_path)
+    cache_utils.link_file(level_dat_path, old_tmp_path)
+    os.replace(old_tmp_path, f"{w_dir}/level.dat_old")
+    os.replace(tmp_path, level_dat_path)
+    logging.info(f"Changed {len(diff)} level.dat entries of '{w_dir}'")
+    return diff
+
+
+def get_saved_worlds(saves_dir: str) -> List[str]:
+    """ Find the worlds of a saves folder.
+
+    :param saves_dir: The saves folder of the game.
+    :return: The folders containing a level.dat, sorted by name.
+    """
+    with os.scandir(saves_dir) as entries:
+        return sorted(
+            e.path for e in entries
+            if e.is_dir() and os.path.isfile(f"{e.path}/level.dat"))
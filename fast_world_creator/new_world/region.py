@@ -0,0 +1,263 @@
+import io
+import logging
+import math
+import multiprocessing
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+from nbtlib import tag
+
+from fast_world_creator.utils import minecraft_utils as mu
+
+# Chunks per side of a region file
+REGION_SIZE = 32
+SECTOR_SIZE = 4096
+WORLD_HEIGHT = 256
+SECTION_HEIGHT = 16
+ZLIB_COMPRESSION = 2
+# Data versions with a different chunk format
+MIN_DATA_VERSION = 1952  # 1.14, first version with the 'full' chunk status
+BIOMES_3D_DATA_VERSION = 2203  # 19w36a, biomes stored per 4x4x4 blocks
+PADDED_STATES_DATA_VERSION = 2529  # 20w17a, block states not split in longs
+MAX_DATA_VERSION = 2730  # 1.17.1, 1.18 changed the world height and sections
+
+
+def get_flat_column(flat_layers: List[tuple]) -> Tuple[np.ndarray, List[str]]:
+    """ Stack the superflat layers into a column of blocks.
+
+    :param flat_layers: The height and block name of every layer, from
+        bottom to top, as returned by minecraft_utils.parse_flat_layers.
+    :return: The palette index of the block at every height, and the palette,
+        which starts with air.
+    """
+    palette = ["minecraft:air"]
+    column = np.zeros(WORLD_HEIGHT, dtype=np.int32)
+    y = 0
+    for height, block in flat_layers:
+        block = block if ":" in block else f"minecraft:{block}"
+        if block not in palette:
+            palette.append(block)
+        top = min(y + int(height), WORLD_HEIGHT)
+        column[y:top] = palette.index(block)
+        y = top
+    return column, palette
+
+
+def pack_block_states(states: np.ndarray, bits: int,
+                      padded: bool) -> np.ndarray:
+    """ Pack the palette indexes of a section into an array of longs.
+
+    :param states: The palette index of every block of the section.
+    :param bits: The bits used by every index.
+    :param padded: Whether indexes are kept within a single long, leaving
+        the remaining high bits unused (1.16+), or split between two longs.
+    :return: The signed longs of the BlockStates array.
+    """
+    states = states.astype(np.uint64)
+    if padded:
+        per_long = 64 // bits
+        rows = -(-len(states) // per_long)
+        states = np.concatenate([
+            states, np.zeros(rows * per_long - len(states), np.uint64)
+        ]).reshape(rows, per_long)
+    # The bits of every index, least significant first
+    shifts = np.arange(bits, dtype=np.uint64)
+    state_bits = ((states[..., None] >> shifts) & 1).astype(np.uint8)
+    state_bits = state_bits.reshape(len(state_bits), -1) if padded \
+        else state_bits.reshape(1, -1)
+    state_bits = np.pad(state_bits,
+                        ((0, 0), (0, -state_bits.shape[1] % 64)))
+    return np.packbits(state_bits, axis=1, bitorder="little") \
+        .view("<i8").reshape(-1)
+
+
+def build_sections(column: np.ndarray, palette: List[str],
+                   data_version: int) -> List[tag.Compound]:
+    """ Build the sections of a chunk in which every layer is a single block.
+
+    Sections that only contain air are left out.
+
+    :param column: The palette index of the block at every height.
+    :param palette: The block names of the palette.
+    :param data_version: The data version of the world.
+    :return: The sections, from bottom to top.
+    """
+    sections = []
+    for section_y in range(WORLD_HEIGHT // SECTION_HEIGHT):
+        section_column = column[
+            section_y * SECTION_HEIGHT:(section_y + 1) * SECTION_HEIGHT]
+        if not section_column.any():
+            continue
+        # Air first, as the game expects for partially filled sections
+        section_palette, local_column = np.unique(
+            section_column, return_inverse=True)
+        bits = max(4, math.ceil(math.log2(len(section_palette))))
+        # Blocks are ordered by height, then z and x
+        states = np.repeat(local_column, SECTION_HEIGHT * SECTION_HEIGHT)
+        sections.append(tag.Compound({
+            "Y": tag.Byte(section_y),
+            "Palette": tag.List[tag.Compound]([
+                tag.Compound({"Name": tag.String(palette[i])})
+                for i in section_palette
+            ]),
+            "BlockStates": tag.LongArray(pack_block_states(
+                states, bits, data_version >= PADDED_STATES_DATA_VERSION))
+        }))
+    return sections
+
+
+def encode_chunk_template(sections: List[tag.Compound], biome_id: int,
+                          data_version: int) -> Tuple[bytes, int, int]:
+    """ Encode the NBT of a chunk, to be reused for every chunk of the world.
+
+    The chunks of a flat world only differ in their position, so only the
+    xPos and zPos values have to be changed in the encoded template.
+
+    :param sections: The sections of the chunk.
+    :param biome_id: The numeric id of the biome of the whole chunk.
+    :param data_version: The data version of the world.
+    :return: The uncompressed NBT and the offsets of the xPos and zPos
+        values in it.
+    """
+    biomes = 1024 if data_version >= BIOMES_3D_DATA_VERSION else 256
+    level = tag.Compound({
+        "xPos": tag.Int(0),
+        "zPos": tag.Int(0),
+        "LastUpdate": tag.Long(0),
+        "InhabitedTime": tag.Long(0),
+        "Status": tag.String("full"),
+        # Lighting and heightmaps are calculated by the game when loaded
+        "isLightOn": tag.Byte(0),
+        "Biomes": tag.IntArray(np.full(biomes, biome_id, dtype=np.int32)),
+        "Sections": tag.List[tag.Compound](sections),
+        "Entities": tag.List[tag.Compound]([]),
+        "TileEntities": tag.List[tag.Compound]([]),
+        "Structures": tag.Compound({
+            "References": tag.Compound(),
+            "Starts": tag.Compound()
+        })
+    })
+    buff = io.BytesIO()
+    tag.write_numeric(tag.BYTE, tag.Compound.tag_id, buff, "big")
+    tag.write_string("", buff, "big")
+    tag.Compound({
+        "DataVersion": tag.Int(data_version),
+        "Level": level
+    }).write(buff, "big")
+    template = buff.getvalue()
+    # Int tag id, name length and name of the position entries
+    x_offset = template.index(b"\x03\x00\x04xPos") + 7
+    z_offset = template.index(b"\x03\x00\x04zPos") + 7
+    return template, x_offset, z_offset
+
+
+def write_region(region_path: str, chunks: List[Tuple[int, int]],
+                 template: bytes, x_offset: int, z_offset: int) -> int:
+    """ Write a region file with copies of a chunk template.
+
+    Runs in the worker processes of pregenerate_flat_regions.
+
+    :param region_path: The path of the .mca file to create.
+    :param chunks: The positions of the chunks to write, in chunks.
+    :param template: The uncompressed NBT of the chunks.
+    :param x_offset: The offset of the xPos value in the template.
+    :param z_offset: The offset of the zPos value in the template.
+    :return: The amount of bytes written.
+    """
+    locations = bytearray(SECTOR_SIZE)
+    timestamps = bytearray(SECTOR_SIZE)
+    now = int(time.time())
+    sector = 2
+    data = []
+    chunk_nbt = bytearray(template)
+    for chunk_x, chunk_z in chunks:
+        struct.pack_into(">i", chunk_nbt, x_offset, chunk_x)
+        struct.pack_into(">i", chunk_nbt, z_offset, chunk_z)
+        compressed = zlib.compress(chunk_nbt)
+        record = struct.pack(">iB", len(compressed) + 1,
+                             ZLIB_COMPRESSION) + compressed
+        sectors = -(-len(record) // SECTOR_SIZE)
+        record += bytes(sectors * SECTOR_SIZE - len(record))
+        index = 4 * ((chunk_x % REGION_SIZE) + (chunk_z % REGION_SIZE)
+                     * REGION_SIZE)
+        struct.pack_into(">I", locations, index, sector << 8 | sectors)
+        struct.pack_into(">I", timestamps, index, now)
+        data.append(record)
+        sector += sectors
+    tmp_path = f"{region_path}.tmp"
+    with open(tmp_path, "wb") as region_file:
+        region_file.write(locations)
+        region_file.write(timestamps)
+        region_file.write(b"".join(data))
+    os.replace(tmp_path, region_path)
+    return sector * SECTOR_SIZE
+
+
+def pregenerate_flat_regions(w_dir: str, data_version: int,
+                             flat_layers: List[tuple], biome: str,
+                             radius: int, max_workers: int = None) \
+        -> Dict[str, int]:
+    """ Write the region files of a superflat world around the spawn.
+
+    Every chunk within the radius is written as already generated, so the
+    game loads it instead of generating it when a player first visits it.
+    The blocks of the layers are generated once and every region file is
+    written in parallel on a pool of processes. Lighting and heightmaps are
+    calculated by the game, and no structures are placed in the chunks.
+
+    :param w_dir: The world folder.
+    :param data_version: The data version of the world (1.14 to 1.17).
+    :param flat_layers: The height and block name of every layer, from
+        bottom to top.
+    :param biome: The biome of the world (e.g. 'plains').
+    :param radius: The chunks around the spawn chunk to generate, in every
+        direction.
+    :param max_workers: The maximum amount of region files written at the
+        same time. Defaults to the amount of CPUs in the system. With 1, or
+        in a daemon process, which can't start processes, they are written
+        one after another in this process.
+    :return: The amount of region files, chunks and bytes written.
+    """
+    if not MIN_DATA_VERSION <= data_version <= MAX_DATA_VERSION:
+        raise ValueError(f"Can't pregenerate regions of data version "
+                         f"{data_version}, only 1.14 to 1.17 are supported")
+    biome = biome.split(":")[-1]
+    if biome not in mu.biome_ids:
+        raise ValueError(f"Unknown biome '{biome}'")
+    column, palette = get_flat_column(flat_layers)
+    template, x_offset, z_offset = encode_chunk_template(
+        build_sections(column, palette, data_version), mu.biome_ids[biome],
+        data_version)
+
+    regions: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    for chunk_x in range(-radius, radius + 1):
+        for chunk_z in range(-radius, radius + 1):
+            regions.setdefault(
+                (chunk_x // REGION_SIZE, chunk_z // REGION_SIZE), []
+            ).append((chunk_x, chunk_z))
+    region_dir = f"{w_dir}/region"
+    os.makedirs(region_dir, exist_ok=True)
+    logging.info(f"Pregenerating {(2 * radius + 1) ** 2} chunks in "
+                 f"{len(regions)} region file(s)")
+    region_args = [
+        (f"{region_dir}/r.{region_x}.{region_z}.mca", chunks, template,
+         x_offset, z_offset)
+        for (region_x, region_z), chunks in regions.items()
+    ]
+    if max_workers == 1 or multiprocessing.current_process().daemon:
+        bytes_written = sum(write_region(*args) for args in region_args)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(write_region, *args)
+                       for args in region_args]
+            bytes_written = sum(f.result() for f in futures)
+    return {
+        "regions": len(regions),
+        "chunks": (2 * radius + 1) ** 2,
+        "bytes_written": bytes_written
+    }
@@ -0,0 +1,81 @@
+import gzip
+import logging
+import os
+from typing import Iterable
+
+from fast_world_creator.new_world import world_index
+from fast_world_creator.new_world.level_dat import LevelFile, patch_level_dat
+from fast_world_creator.new_world.world_creator import WorldCreator
+from fast_world_creator.utils import cache_utils
+
+# Files of a world that are written for every clone instead of shared. The
+# fingerprint of the golden world does not describe the clones
+WORLD_FILES = ("level.dat", "level.dat_old", "session.lock",
+               world_index.FINGERPRINT_NAME)
+# Folders whose files the game never writes, so clones can share them
+IMMUTABLE_FOLDERS = ("datapacks",)
+
+
+class WorldCloner:
+    """ Creates copies of a golden world that only differ in name and seed.
+
+    The files of the golden world are listed and its level.dat is read once.
+    Every clone gets hardlinks of the immutable files, such as the datapack
+    zips, and a level.dat patched with its name and seed. The files the game
+    writes in place, such as the region files, would change every clone if
+    they were hardlinked, so they get copy-on-write copies instead (or plain
+    copies if the filesystem does not support them).
+    """
+
+    def __init__(self, golden_dir: str, exclude: Iterable[str] = ()):
+        """
+        :param golden_dir: The folder of the golden world.
+        :param exclude: Paths relative to the world folder that must not be
+            cloned (e.g. datapacks that depend on the seed).
+        """
+        self.golden_dir = golden_dir
+        exclude = {*WORLD_FILES, *(os.path.normpath(p) for p in exclude)}
+        self.folders = list()
+        self.files = list()
+        for folder, _, files in os.walk(golden_dir):
+            relative_folder = os.path.relpath(folder, golden_dir)
+            if relative_folder != ".":
+                self.folders.append(relative_folder)
+            for f in files:
+                path = os.path.normpath(f"{relative_folder}/{f}")
+                if path not in exclude:
+                    self.files.append(path)
+        with gzip.open(f"{golden_dir}/level.dat", "rb") as level_dat_file:
+            self.level_dat = level_dat_file.read()
+        golden_data = LevelFile.load(f"{golden_dir}/level.dat").data
+        self.golden_values = {
+            "LevelName": str(golden_data["LevelName"]),
+            "RandomSeed": int(golden_data["RandomSeed"])
+        }
+        logging.info(f"Cloning {len(self.files)} files of '{golden_dir}'")
+
+    def clone_files(self, w_dir: str) -> int:
+        """ Create the folders and files of the golden world in a new world.
+
+        :param w_dir: The folder of the new world, which must exist.
+        :return: The amount of files cloned.
+        """
+        for folder in self.folders:
+            os.makedirs(f"{w_dir}/{folder}", exist_ok=True)
+        for path in self.files:
+            src, dst = f"{self.golden_dir}/{path}", f"{w_dir}/{path}"
+            if path.split(os.sep)[0] in IMMUTABLE_FOLDERS:
+                cache_utils.link_file(src, dst)
+            else:
+                cache_utils.copy_file(src, dst)
+        return len(self.files)
+
+    def save_level_dat(self, wc: WorldCreator) -> int:
+        """ Save the golden level.dat with the name and seed of another world.
+
+        :param wc: The world creator of the clone, whose folder must exist.
+        :return: The amount of bytes written to level.dat.
+        """
+        return wc.save_level_dat(patch_level_dat(
+            self.level_dat, self.golden_values,
+            {"LevelName": wc.name, "RandomSeed": wc.seed}))
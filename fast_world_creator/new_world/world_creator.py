@@ -1,12 +1,15 @@
+import gzip
 import hashlib as hl
 import logging
 import os
 import random
 from typing import List
 
-from fast_world_creator.new_world.level_dat import LevelFile
+from fast_world_creator.new_world import world_names
+from fast_world_creator.new_world.level_dat import get_compiled_level_dat
 from fast_world_creator.utils import common_utils as cu
 from fast_world_creator.utils import minecraft_utils as mu
+from fast_world_creator.utils.level_dat_utils import get_border_level_data
 
 
 class WorldCreator:
@@ -14,7 +17,8 @@ class WorldCreator:
     def __init__(self, mc_release: str, world_name: str, seed: int = None):
         self.mc_release = mc_release
         self.name = world_name
-        if not seed:
+        # Seed 0 is a valid seed, only a missing one is randomized
+        if seed is None or seed == "":
             logging.info("Seed was empty. Creating randomized seed.")
             seed = random.randint(0, 1000000)
         try:
@@ -24,24 +28,31 @@ class WorldCreator:
             # No parsable integer. Create hash and convert lowest values to int
             self.seed = int(hl.md5(seed.encode("utf-8")).hexdigest()[:7], 16)
         logging.info(f"Seed = {self.seed}")
-        self.w_dir = f"{cu.MC_FOLDER}/saves/{self.name}"
+        # Set once the world folder is created
+        self.w_dir = None
+
+    @property
+    def datapack_dir(self) -> str:
+        """ The folder holding the datapack zips of the world. """
+        return f"{self.w_dir}/datapacks"
 
     def create_world_directory(self) -> str:
         """ Create the world folder based on the world name.
 
         Creates a world folder to store the new world. The name of the world
         folder will match the world name, except if the folder already exists.
-        In that case, try to create a folder with the world seed appended.
+        In that case, the world seed is appended, and a number if that folder
+        exists too. Worlds without a name are named after their folder,
+        a numbered 'FastNewWorld'.
         :return: The path to the created directory """
-        try:
-            if os.path.isdir(self.w_dir):
-                self.w_dir += str(self.seed)
-            logging.info(f"Creating world folder {self.w_dir}")
-            os.mkdir(self.w_dir)
-            return self.w_dir
-        except FileExistsError as e:
-            logging.error(f"World folder \'{self.name}\' already exists")
-            raise e
+        allocator = world_names.get_name_allocator(f"{cu.MC_FOLDER}/saves")
+        if self.name:
+            self.w_dir = allocator.allocate(self.name, ("", str(self.seed)))
+        else:
+            self.w_dir = allocator.allocate(world_names.DEFAULT_WORLD_NAME, ())
+            self.name = os.path.basename(self.w_dir)
+        logging.info(f"Created world folder {self.w_dir}")
+        return self.w_dir
 
     def create_datapack_directory(self) -> None:
         """ Create the datapack directory used to store all the datapack zips.
@@ -49,17 +60,53 @@ class WorldCreator:
         Creates a folder named 'datapacks' in the world directory. Will
         intentionally fail if the world directory has not been created yet.
         """
-        logging.info(f"Creating world datapacks folder {self.w_dir}")
-        os.mkdir(f"{self.w_dir}/datapacks")
-
-    def create_level_dat(self, gamerules: dict, difficulty: int,
-                         datapack_list: List[str], game_mode: int = 0,
-                         raining: bool = False, thundering: bool = False,
-                         border_settings: dict = None,
-                         generator: str = "default",
-                         generator_opts: dict = None) -> None:
+        logging.info(f"Creating world datapacks folder {self.datapack_dir}")
+        os.mkdir(self.datapack_dir)
+
+    def create_level_dat(self, *args, **kwargs) -> None:
         """ Creates the level.dat NBT file in the new world folder.
 
+        Accepts the same arguments as build_level_dat_dict. The constant parts
+        of the level.dat template are encoded once per version, and only the
+        values of this world are encoded for every new world.
+        """
+        self.save_level_dat(self.encode_level_dat(*args, **kwargs))
+
+    def encode_level_dat(self, *args, **kwargs) -> bytes:
+        """ Encode the uncompressed NBT contents of level.dat.
+
+        Accepts the same arguments as build_level_dat_dict.
+
+        :return: The NBT bytes, ready to be compressed and saved.
+        """
+        level_dat_dict = self.build_level_dat_dict(*args, **kwargs)
+        logging.info("Encoding NBT tags")
+        compiled_level_dat = get_compiled_level_dat(
+            level_dat_dict["Version"], tuple(level_dat_dict))
+        return compiled_level_dat.encode(level_dat_dict)
+
+    def save_level_dat(self, level_dat: bytes) -> int:
+        """ Compress and save the level.dat file in the new world folder.
+
+        :param level_dat: The NBT bytes, as returned by encode_level_dat.
+        :return: The amount of bytes written to the file.
+        """
+        world_level_dat = f"{self.w_dir}/level.dat"
+        logging.info(f"Creating level.dat file in '{world_level_dat}'")
+        # No modification time in the gzip header, so equal worlds get
+        # byte-identical files
+        with gzip.GzipFile(world_level_dat, "wb", mtime=0) as level_dat_file:
+            level_dat_file.write(level_dat)
+        return os.path.getsize(world_level_dat)
+
+    def build_level_dat_dict(self, gamerules: dict, difficulty: int,
+                             datapack_list: List[str], game_mode: int = 0,
+                             raining: bool = False, thundering: bool = False,
+                             border_settings: dict = None,
+                             generator: str = "default",
+                             generator_opts: dict = None) -> dict:
+        """ Collect the values of this world that go into level.dat.
+
         :param gamerules: A dictionary containing all the game rules and their
             values for this world.
         :param difficulty: An integer representing the difficulty of the world.
@@ -75,13 +122,12 @@ class WorldCreator:
         :param generator_opts: A dictionary containing the options for the flat
             and buffet terrain generators. If the parameter generator is neither
             "buffet" nor "flat", this parameter is ignored.
+        :return: The values that override the level.dat template.
         """
-        world_level_dat = f"{self.w_dir}/level.dat"
-        logging.info(f"Starting creation of level.dat in '{world_level_dat}'")
         mc = "minecraft:"
         level_dat_dict = {
             "Version": {
-                "Id": mu.version_map.get(self.mc_release),
+                "Id": cu.get_data_version(self.mc_release),
                 "Name": self.mc_release
             },
             "LevelName": self.name,
@@ -97,16 +143,7 @@ class WorldCreator:
             "GameType": game_mode,
             "raining": True if thundering else raining,
             "thundering": thundering or False,
-            "BorderCenterX": float(border_settings.get("x")),
-            "BorderCenterZ": float(border_settings.get("z")),
-            "BorderDamagePerBlock": float(border_settings.get("damage")),
-            "BorderSafeZone": float(border_settings.get("safe_blocks")),
-            "BorderSize": float(border_settings.get("size")),
-            "BorderSizeLerpTarget": float(border_settings.get("size_target")),
-            "BorderSizeLerpTime": int(
-                float(border_settings.get("lerp_time")) * 600),
-            "BorderWarningBlocks": float(border_settings.get("warn_blocks")),
-            "BorderWarningTime": float(border_settings.get("warn_time"))
+            **get_border_level_data(border_settings)
         }
         if generator == "buffet":
             logging.info("Adding buffet options")
@@ -144,8 +181,4 @@ class WorldCreator:
                 "structures": generator_opts.get("flat_structures")
             }
             level_dat_dict["generatorOptions"] = generator_options_dict
-
-        logging.info("Parsing NBT tags")
-        level_file = LevelFile.from_arguments(level_dat_dict)
-        logging.info("Creating level.dat file")
-        level_file.save(filename=world_level_dat)
+        return level_dat_dict
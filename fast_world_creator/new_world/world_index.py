@@ -0,0 +1,104 @@
+import hashlib as hl
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+from fast_world_creator.utils import cache_utils
+
+# Stored in the folder of every world created with a fingerprint
+FINGERPRINT_NAME = "fast_world_creator.json"
+# Part of the fingerprint, so changes to the world creation invalidate the
+# worlds created before
+FINGERPRINT_VERSION = 1
+# Folders of a world whose files are listed with their size in the
+# fingerprint file, so they are checked without reading them
+CHECKED_FOLDERS = ("datapacks", "region")
+
+
+def get_world_fingerprint(inputs: dict) -> str:
+    """ Create the canonical fingerprint of the inputs of a world.
+
+    :param inputs: Every input that changes the created world, made of JSON
+        serializable values. Datapacks must be given by their contents, not
+        by the datapack objects.
+    :return: A hexadecimal digest which changes whenever any input does.
+    """
+    canonical = json.dumps([FINGERPRINT_VERSION, inputs], sort_keys=True,
+                           separators=(",", ":"), default=str)
+    return hl.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _get_level_dat_digest(w_dir: str) -> str:
+    with open(f"{w_dir}/level.dat", "rb") as level_dat_file:
+        return hl.sha256(level_dat_file.read()).hexdigest()
+
+
+def _get_file_sizes(w_dir: str) -> Dict[str, int]:
+    """ List the files of the checked folders of a world with their size. """
+    sizes = {}
+    for folder in CHECKED_FOLDERS:
+        try:
+            with os.scandir(f"{w_dir}/{folder}") as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        sizes[f"{folder}/{entry.name}"] = entry.stat().st_size
+        except FileNotFoundError:
+            pass
+    return sizes
+
+
+def find_world(fingerprint: str) -> Optional[str]:
+    """ Find a world created before with the same fingerprint.
+
+    The index is looked up by fingerprint, so it takes the same time however
+    many worlds were created. Worlds that were deleted, or whose level.dat
+    changed since they were created (because they were played or edited),
+    are not returned. Neither are worlds whose datapacks or region files
+    were added, removed or replaced by files of a different size.
+
+    :param fingerprint: The fingerprint of the world inputs.
+    :return: The path to the world folder or None if there is no such world.
+    """
+    entry = cache_utils.load_index(f"worlds/{fingerprint}")
+    if not entry:
+        return None
+    w_dir = entry["path"]
+    try:
+        with open(f"{w_dir}/{FINGERPRINT_NAME}", "r") as fingerprint_file:
+            stored = json.load(fingerprint_file)
+        if stored["fingerprint"] == fingerprint and \
+                stored["level_dat"] == _get_level_dat_digest(w_dir) and \
+                stored["files"] == _get_file_sizes(w_dir):
+            logging.info(f"Found existing world '{w_dir}'")
+            return w_dir
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    logging.info(f"World '{w_dir}' changed since it was created")
+    return None
+
+
+def register_world(w_dir: str, fingerprint: str, inputs: dict) -> None:
+    """ Store the fingerprint of a created world in its folder and the index.
+
+    Must be called once the world is complete, as the digest of its
+    level.dat and the size of its datapacks and region files are stored to
+    detect later changes.
+
+    :param w_dir: The world folder.
+    :param fingerprint: The fingerprint of the world inputs.
+    :param inputs: The inputs of the world, stored next to the fingerprint
+        for reference.
+    """
+    fingerprint_path = f"{w_dir}/{FINGERPRINT_NAME}"
+    tmp_path = f"{fingerprint_path}.tmp"
+    with open(tmp_path, "w") as fingerprint_file:
+        json.dump({
+            "fingerprint": fingerprint,
+            "level_dat": _get_level_dat_digest(w_dir),
+            "files": _get_file_sizes(w_dir),
+            "inputs": inputs
+        }, fingerprint_file, indent=4, default=str)
+    os.replace(tmp_path, fingerprint_path)
+    cache_utils.store_index(f"worlds/{fingerprint}",
+                            {"path": os.path.abspath(w_dir)})
@@ -0,0 +1,75 @@
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, Sequence
+
+# Name of the worlds created without a name, which are numbered
+DEFAULT_WORLD_NAME = "FastNewWorld"
+
+
+class WorldNameAllocator:
+    """ Reserves world folders in a saves folder without collisions.
+
+    The names in the saves folder are listed once, and every name reserved
+    or found taken afterwards is added to the list, so numbered names are
+    found without checking the taken ones on disk again. A folder is
+    reserved by creating it: os.mkdir fails if it already exists, so two
+    threads or processes never reserve the same folder, even if their lists
+    are out of date. When that happens, the next name is tried.
+    """
+
+    def __init__(self, saves_dir: str):
+        """
+        :param saves_dir: The saves folder of the game.
+        """
+        self.saves_dir = saves_dir
+        os.makedirs(saves_dir, exist_ok=True)
+        self.taken = set(os.listdir(saves_dir))
+        # Next number to try for every numbered name
+        self.counters: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        logging.info(f"Found {len(self.taken)} names in use in '{saves_dir}'")
+
+    def _reserve(self, name: str) -> bool:
+        """ Create the folder of a name, if it does not exist yet. """
+        self.taken.add(name)
+        try:
+            os.mkdir(f"{self.saves_dir}/{name}")
+            return True
+        except FileExistsError:
+            return False
+
+    def allocate(self, name: str, suffixes: Sequence[str] = ("",)) -> str:
+        """ Reserve the folder of a world.
+
+        The name is tried with every suffix first. If all of them are taken,
+        the first free numbered name is used (e.g. 'name_2').
+
+        :param name: The name of the world.
+        :param suffixes: The suffixes to try before numbering the name. With
+            no suffixes, the name is always numbered.
+        :return: The path to the created empty folder.
+        """
+        with self.lock:
+            for suffix in suffixes:
+                # Always tried on disk, the folder may have been deleted since
+                if self._reserve(f"{name}{suffix}"):
+                    return f"{self.saves_dir}/{name}{suffix}"
+            number = self.counters.get(name, 1)
+            while True:
+                candidate = f"{name}_{number}"
+                number += 1
+                if candidate not in self.taken and self._reserve(candidate):
+                    self.counters[name] = number
+                    return f"{self.saves_dir}/{candidate}"
+
+
+@lru_cache(maxsize=4)
+def get_name_allocator(saves_dir: str) -> WorldNameAllocator:
+    """ Get the allocator of a saves folder, once per process.
+
+    :param saves_dir: The saves folder of the game.
+    :return: The allocator, shared by every world created in the process.
+    """
+    return WorldNameAllocator(saves_dir)
@@ -1,22 +1,38 @@
 from __future__ import annotations
 
 import logging
+from typing import Dict, List
 
 import PySimpleGUI as sg
 
 from fast_world_creator.utils import common_utils as cu, minecraft_utils as mu
 
-supported_versions = [k for k in mu.version_map]
-installed_versions = [k for k in cu.find_installed_minecraft_versions()]
-installed_versions.sort(reverse=True)
-generators = mu.generator_names
-generators.sort()
-superflat_presets = [p.split(";") for p in
-                     mu.get_mc_definitions("superflat_presets")]
-superflat_dict = {preset[0]: preset[1:] for preset in superflat_presets}
 SF_BLOCK, SF_BIOME, SF_STRUCT = range(0, 3)
 
 
+def get_supported_versions() -> List[str]:
+    """ Get the known and installed Minecraft versions, newest first. """
+    versions = {*mu.version_map, *cu.find_installed_minecraft_versions()}
+    return sorted(versions, key=lambda v: int(cu.get_data_version(v)),
+                  reverse=True)
+
+
+def get_installed_versions() -> List[str]:
+    """ Get the installed Minecraft versions, newest first. """
+    return sorted(cu.find_installed_minecraft_versions(),
+                  key=lambda v: int(cu.get_data_version(v)), reverse=True)
+
+
+def get_superflat_presets() -> List[List[str]]:
+    """ Get the superflat presets as [name, layers, biome, structures]. """
+    return [p.split(";") for p in mu.get_mc_definitions("superflat_presets")]
+
+
+def get_superflat_dict() -> Dict[str, List[str]]:
+    """ Get the [layers, biome, structures] of every superflat preset. """
+    return {preset[0]: preset[1:] for preset in get_superflat_presets()}
+
+
 class FwcWindow(sg.Window):
 
     def __init__(self, *args, **kwargs):
@@ -24,9 +40,9 @@ class FwcWindow(sg.Window):
 
     def parse_events(self, event: str, val_dict: dict) -> None:
         if event == "main_installed_versions":
-            self["main_release"].update(values=installed_versions)
+            self["main_release"].update(values=get_installed_versions())
         elif event == "main_all_versions":
-            self["main_release"].update(values=supported_versions)
+            self["main_release"].update(values=get_supported_versions())
         elif event == "terrain_generator":
             if val_dict[event] == "Buffet":
                 self["buffet_option_frame"].unhide_row()
@@ -46,6 +62,7 @@ class FwcWindow(sg.Window):
             else:
                 self["buffet_size"].hide_row()
         elif event == "flat_preset":
+            superflat_dict = get_superflat_dict()
             self["flat_biome"].update(
                 value=superflat_dict[val_dict[event]][SF_BIOME])
             self["flat_layers"].update(
@@ -65,6 +82,7 @@ class FwcWindow(sg.Window):
             main tab, and populated from the assets/datapacks folder.
             """
             logging.debug("Creating main tab layout")
+            installed_versions = get_installed_versions()
             layout = [[
                 sg.Frame("Version", [
                     [
@@ -183,7 +201,8 @@ class FwcWindow(sg.Window):
             layout = []
             layout += [[
                 sg.T("World type", (16, 1), pad=(10, 10)),
-                sg.Combo(generators, "Default", (25, 1), pad=(3, 10),
+                sg.Combo(sorted(mu.generator_names), "Default", (25, 1),
+                         pad=(3, 10),
                          readonly=True, enable_events=True,
                          key="terrain_generator")
             ]]
@@ -250,12 +269,13 @@ class FwcWindow(sg.Window):
             can be easily differentiated by the users.
             """
             logging.debug("Creating superflat layout")
+            superflat_presets = get_superflat_presets()
             layout = []
             layout += [[
                 sg.T("Presets", (15, 1)),
-                sg.Combo(list(superflat_dict.keys()), superflat_presets[0][0],
-                         (25, 1), readonly=True, enable_events=True,
-                         key="flat_preset")
+                sg.Combo([p[0] for p in superflat_presets],
+                         superflat_presets[0][0], (25, 1), readonly=True,
+                         enable_events=True, key="flat_preset")
             ]]
             layout += [[
                 sg.T("Biome", (15, 1)),
@@ -340,8 +360,9 @@ class FwcWindow(sg.Window):
             [sg.TabGroup([[tab1, tab2, tab3, tab4]])],
             [
                 sg.B("Create", button_color=("white", "green")),
+                sg.B("Cancel", tooltip="Cancel the queued worlds"),
                 sg.B("Quit", button_color=("white", "red")),
-                sg.ProgressBar(100, "horizontal", (13, 23),
+                sg.ProgressBar(100, "horizontal", (8, 23),
                                bar_color=("#FDCB52", "#2C2825"),
                                key="progress_bar"),
                 sg.B("Save", tooltip="Save values to template"),
@@ -374,8 +395,8 @@ class FwcWindow(sg.Window):
         if self["buffet_biome_type"].get() != "Checkerboard":
             self["buffet_size"].hide_row()
         if self["main_all_versions"].get():
-            self["main_release"].update(values=supported_versions,
+            self["main_release"].update(values=get_supported_versions(),
                                         value=self["main_release"].get())
         else:
-            self["main_release"].update(values=installed_versions,
+            self["main_release"].update(values=get_installed_versions(),
                                         value=self["main_release"].get())
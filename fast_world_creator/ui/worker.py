@@ -0,0 +1,106 @@
+import logging
+import queue
+import shutil
+import threading
+from typing import Callable, Generator, List, Tuple
+
+from fast_world_creator.utils import trace_utils as tu
+
+# Events sent to the interface, as tuples starting with the event name
+START, PROGRESS, DONE, CANCELLED, ERROR = \
+    "start", "progress", "done", "cancelled", "error"
+
+
+class CreationWorker(threading.Thread):
+    """ Background thread that creates the queued worlds one after another.
+
+    The interface submits creations and polls the events of the worker, so it
+    stays responsive while a world is being created. Cancelling stops the
+    current creation before its next stage, deletes its partially created
+    world folder and discards the queued ones.
+    """
+
+    def __init__(self):
+        super(CreationWorker, self).__init__(name="CreationWorker",
+                                             daemon=True)
+        self.jobs = queue.Queue()
+        self.events = queue.Queue()
+        # Jobs submitted before the last cancellation are not run
+        self.generation = 0
+
+    def submit(self, world_name: str,
+               execution: Callable[[], Generator[tu.Span, None, str]],
+               total_stages: int) -> None:
+        """ Queue the creation of a world.
+
+        :param world_name: The name of the world, used in the events.
+        :param execution: Starts the core execution of the world.
+        :param total_stages: The amount of spans the execution yields, to
+            report the progress as a percentage.
+        """
+        logging.info(f"Queueing creation of '{world_name}' "
+                     f"({self.jobs.qsize()} already queued)")
+        self.jobs.put((self.generation, world_name, execution, total_stages))
+
+    def cancel(self) -> None:
+        """ Cancel the current creation and every queued one. """
+        logging.info("Cancelling the queued creations")
+        self.generation += 1
+
+    def stop(self) -> None:
+        """ Cancel every creation and wait for the worker to finish. """
+        self.cancel()
+        self.jobs.put(None)
+        self.join()
+
+    def get_events(self) -> List[Tuple]:
+        """ Get the events sent by the worker since the last call. """
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def run(self) -> None:
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            generation, world_name, execution, total_stages = job
+            if generation != self.generation:
+                self.events.put((CANCELLED, world_name))
+                continue
+            self._create(generation, world_name, execution(), total_stages)
+
+    def _create(self, generation: int, world_name: str,
+                execution: Generator[tu.Span, None, str],
+                total_stages: int) -> None:
+        """ Run a core execution, reporting its progress. """
+        self.events.put((START, world_name))
+        w_dir = None
+        stage_counter = 0
+        try:
+            while True:
+                if generation != self.generation:
+                    execution.close()
+                    if w_dir:
+                        logging.info(f"Deleting cancelled world {w_dir}")
+                        shutil.rmtree(w_dir, ignore_errors=True)
+                    self.events.put((CANCELLED, world_name))
+                    return
+                try:
+                    span = next(execution)
+                except StopIteration as stop:
+                    self.events.put((DONE, world_name, stop.value))
+                    return
+                w_dir = w_dir or span.args.get("path")
+                stage_counter += 1
+                logging.info(f"Stage '{span.name}' finished in "
+                             f"{span.duration * 1000:.1f}ms "
+                             f"{span.args or ''}".rstrip())
+                self.events.put((PROGRESS, world_name, min(
+                    stage_counter / total_stages * 100, 100)))
+        except Exception as e:
+            logging.exception(f"Failed to create world '{world_name}'")
+            self.events.put((ERROR, world_name, f"{type(e).__name__}: {e}"))
@@ -0,0 +1,279 @@
+import hashlib as hl
+import json
+import logging
+import marshal
+import os
+import shutil
+import threading
+from typing import Any, Dict, Optional
+
+# Every cache lives in a subfolder of this one, resolved when it is used
+CACHE_FOLDER = f"{os.getcwd()}/cache"
+ARTIFACT_MAX_SIZE = 1024 * 1024 * 1024
+# Size cap of every index folder, which is trimmed every INDEX_EVICT_INTERVAL
+# indexes stored by a process, starting with the first one
+INDEX_MAX_SIZE = 128 * 1024 * 1024
+INDEX_EVICT_INTERVAL = 64
+# Linux ioctl to share the extents of a file (copy-on-write copy)
+FICLONE = 0x40049409
+HASH_CHUNK_SIZE = 1024 * 1024
+
+artifact_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+# Digest of already hashed files, by their cache key
+_file_digests: Dict[str, str] = {}
+# Indexes stored by this process, by index folder
+_index_stores: Dict[str, int] = {}
+
+
+def get_file_key(path: str, *extra: str) -> str:
+    """ Create a cache key from the path, size and mtime of a file.
+
+    :param path: The path to the file.
+    :param extra: Additional strings that should take part in the key.
+    :return: A hexadecimal digest which changes whenever the file does.
+    """
+    stat = os.stat(path)
+    key = "|".join([os.path.abspath(path), str(stat.st_size),
+                    str(stat.st_mtime_ns), *extra])
+    return hl.sha1(key.encode("utf-8")).hexdigest()
+
+
+def evict_least_recently_used(folder: str, max_size: int,
+                              keep: str = None) -> None:
+    """ Delete the oldest files of a cache folder until it fits the size cap.
+
+    Files are considered used whenever their mtime is updated, which the
+    cache accessors do on every hit.
+
+    :param folder: The cache folder to trim.
+    :param max_size: The maximum total size of the folder in bytes.
+    :param keep: A path that must not be deleted (e.g. the file just stored).
+    """
+    entries = []
+    for entry in os.scandir(folder):
+        if entry.is_file() and not entry.name.endswith(".tmp"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total_size = sum(e[1] for e in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+        if keep and os.path.samefile(path, keep):
+            continue
+        logging.info(f"Evicting '{path}' from the cache")
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # Evicted by another process
+        total_size -= size
+
+
+def get_file_digest(path: str) -> str:
+    """ Get the SHA-256 digest of the contents of a file.
+
+    The digest is remembered for as long as the file path, size and mtime do
+    not change, so every file is only read once per process.
+
+    :param path: The path to the file.
+    :return: The hexadecimal digest of the file contents.
+    """
+    key = get_file_key(path)
+    if key not in _file_digests:
+        digest = hl.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        _file_digests[key] = digest.hexdigest()
+    return _file_digests[key]
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """ Try to create a copy-on-write copy of a file.
+
+    :return: True if the filesystem supports it and the copy was created.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as src_f, open(dst, "wb") as dst_f:
+            fcntl.ioctl(dst_f.fileno(), FICLONE, src_f.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+
+def link_file(src: str, dst: str) -> str:
+    """ Make a file available in another path as cheaply as possible.
+
+    Tries a hardlink first, then a copy-on-write copy and finally a plain
+    copy, which also works across filesystems.
+
+    :param src: The path of the existing file.
+    :param dst: The path to create. Must not exist.
+    :return: The method used: 'hardlink', 'reflink' or 'copy'.
+    """
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    if _reflink(src, dst):
+        return "reflink"
+    shutil.copyfile(src, dst)
+    return "copy"
+
+
+def copy_file(src: str, dst: str) -> str:
+    """ Copy a file that may be modified later as cheaply as possible.
+
+    Unlike link_file, the copy never shares its data with the original, so
+    either of them can be written in place afterwards.
+
+    :param src: The path of the existing file.
+    :param dst: The path to create. Must not exist.
+    :return: The method used: 'reflink' or 'copy'.
+    """
+    if _reflink(src, dst):
+        return "reflink"
+    shutil.copyfile(src, dst)
+    return "copy"
+
+
+def _get_tmp_path(path: str) -> str:
+    """ Get a temporary path next to a file, unique per process and thread. """
+    return f"{path}.{os.getpid()}_{threading.get_ident()}.tmp"
+
+
+def _get_object_path(digest: str, extension: str) -> str:
+    return f"{CACHE_FOLDER}/artifacts/objects/{digest}{extension}"
+
+
+def get_artifact(key: str) -> Optional[str]:
+    """ Find an artifact stored with a key.
+
+    :param key: The key the artifact was stored with, derived from all the
+        inputs that produce it.
+    :return: The path to the stored artifact or None if it is not stored.
+    """
+    ref_path = f"{CACHE_FOLDER}/artifacts/refs/{key}"
+    try:
+        with open(ref_path, "r") as ref_file:
+            object_path = ref_file.read().strip()
+        os.utime(object_path)
+    except FileNotFoundError:
+        artifact_stats["misses"] += 1
+        logging.info(f"Artifact store miss for '{key}' "
+                     f"(hits: {artifact_stats['hits']}, "
+                     f"misses: {artifact_stats['misses']})")
+        return None
+    artifact_stats["hits"] += 1
+    logging.info(f"Artifact store hit for '{key}' "
+                 f"(hits: {artifact_stats['hits']}, "
+                 f"misses: {artifact_stats['misses']})")
+    return object_path
+
+
+def store_artifact(path: str, key: str = None,
+                   max_size: int = ARTIFACT_MAX_SIZE) -> str:
+    """ Add a file to the content-addressed artifact store.
+
+    Files are stored by the digest of their contents, so equal files are only
+    stored once. The file is copied into the store (copy-on-write if
+    possible) rather than hardlinked, so later changes to the original file
+    can never alter the stored artifact.
+
+    :param path: The path to the file to store.
+    :param key: An optional key to find the artifact later with get_artifact.
+    :param max_size: The size cap of the artifact store in bytes. The least
+        recently used artifacts are deleted once it is exceeded.
+    :return: The path to the stored artifact.
+    """
+    objects_folder = f"{CACHE_FOLDER}/artifacts/objects"
+    os.makedirs(objects_folder, exist_ok=True)
+    object_path = _get_object_path(get_file_digest(path),
+                                   os.path.splitext(path)[1])
+    if os.path.isfile(object_path):
+        os.utime(object_path)
+    else:
+        tmp_path = _get_tmp_path(object_path)
+        if not _reflink(path, tmp_path):
+            shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, object_path)
+        logging.info(f"Stored '{path}' in the artifact store")
+        evict_least_recently_used(objects_folder, max_size, keep=object_path)
+    if key:
+        refs_folder = f"{CACHE_FOLDER}/artifacts/refs"
+        os.makedirs(refs_folder, exist_ok=True)
+        tmp_path = _get_tmp_path(f"{refs_folder}/{key}")
+        with open(tmp_path, "w") as ref_file:
+            ref_file.write(object_path)
+        os.replace(tmp_path, f"{refs_folder}/{key}")
+    return object_path
+
+
+def _get_index_path(name: str, binary: bool) -> str:
+    extension = f"marshal{marshal.version}" if binary else "json"
+    return f"{CACHE_FOLDER}/indexes/{name}.{extension}"
+
+
+def load_index(name: str, binary: bool = False) -> Optional[Any]:
+    """ Read an index stored in the cache.
+
+    :param name: The name of the index.
+    :param binary: Whether the index was stored in the binary format.
+    :return: The index or None if it does not exist or can't be read.
+    """
+    index_path = _get_index_path(name, binary)
+    try:
+        if binary:
+            with open(index_path, "rb") as index_file:
+                index = marshal.load(index_file)
+        else:
+            with open(index_path, "r") as index_file:
+                index = json.load(index_file)
+        # Marks the index as used for the eviction
+        os.utime(index_path)
+        return index
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, EOFError, TypeError):
+        logging.warning(f"Ignoring unreadable index '{name}'")
+        return None
+
+
+def store_index(name: str, index: Any, binary: bool = False,
+                max_size: int = INDEX_MAX_SIZE) -> None:
+    """ Store an index in the cache.
+
+    The file is replaced atomically, so concurrent processes read either the
+    old or the new index.
+
+    :param name: The name of the index.
+    :param index: The index, made of JSON serializable values.
+    :param binary: Whether to store the index with marshal instead of JSON.
+        It is several times faster to load, which matters for large indexes,
+        but it can only be read by the same Python version.
+    :param max_size: The size cap of the folder of the index in bytes. The
+        least recently used indexes are deleted once it is exceeded. The
+        folder is only checked every INDEX_EVICT_INTERVAL stores, as it may
+        hold an index per world created.
+    """
+    index_path = _get_index_path(name, binary)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    tmp_path = _get_tmp_path(index_path)
+    if binary:
+        with open(tmp_path, "wb") as index_file:
+            marshal.dump(index, index_file)
+    else:
+        with open(tmp_path, "w") as index_file:
+            json.dump(index, index_file)
+    os.replace(tmp_path, index_path)
+    index_folder = os.path.dirname(index_path)
+    stores = _index_stores.get(index_folder, 0)
+    _index_stores[index_folder] = stores + 1
+    if stores % INDEX_EVICT_INTERVAL == 0:
+        evict_least_recently_used(index_folder, max_size, keep=index_path)
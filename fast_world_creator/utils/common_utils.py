@@ -1,11 +1,15 @@
+import hashlib as hl
+import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 from functools import lru_cache
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
+from zipfile import ZipFile, BadZipFile
 
-from fast_world_creator.datapacks import external_datapack as ed, \
-    random_loot as rl
+from fast_world_creator.datapacks.base_datapack import Datapack
+from fast_world_creator.utils import cache_utils
 from fast_world_creator.utils import minecraft_utils as mu
 
 MC_FOLDER = f"{os.getenv('APPDATA')}/.minecraft"
@@ -114,10 +118,10 @@ def set_default_ui_values(ui_values: dict, template_file: str = None) -> None:
 def find_installed_minecraft_versions(mc_dir: str = None) -> Dict:
     """ Finds the available jars of vanilla Minecraft in the system.
 
-    Looks up the supported Jar files stored in mc_dir/versions folder and stores
-    their name (e.g. '1.15.2') and path in a dictionary. The list of supported
-    versions are obtained from the data version map, so not every Jar file in
-    the path will be added to the dictionary.
+    Looks up the Jar files stored in mc_dir/versions folder and stores their
+    name (e.g. '1.15.2') and path in a dictionary. Versions in the data version
+    map are always supported, and newer releases are detected from the data
+    version stored in their Jar file.
 
     The method caches the result to prevent system lookups every time it is
     called.
@@ -125,26 +129,104 @@ def find_installed_minecraft_versions(mc_dir: str = None) -> Dict:
     :param mc_dir: The Minecraft installation directory (.minecraft)
     :return: A dictionary containing the installed (and supported) minecraft
         versions and the path to the Jar files."""
-    logging.info("Looking for installed minecraft versions")
-    if not mc_dir:
-        mc_dir = MC_FOLDER
-    installations_folder = f"{mc_dir}/versions"
-    installations = os.listdir(installations_folder)
-
-    installed_versions = dict()
-    for i in installations:
-        if i in mu.version_map.keys():
-            version_folder = f"{installations_folder}/{i}"
-            if os.path.isdir(version_folder):
-                version_jar = f"{version_folder}/{i}.jar"
-                if os.path.isfile(version_jar):
-                    installed_versions[str(i)] = str(version_jar)
+    installed_versions = {
+        name: entry["jar"]
+        for name, entry in get_installed_version_index(
+            mc_dir or MC_FOLDER).items()
+        if entry["data_version"]
+    }
     logging.info(f"Found {len(installed_versions)} installed version(s)")
     if not installed_versions:
         logging.warning("There are no installed Minecraft versions")
     return installed_versions
 
 
+@lru_cache(maxsize=4)
+def get_installed_version_index(mc_dir: str = None) -> Dict[str, dict]:
+    """ Get the index of the Jar files in the Minecraft versions folder.
+
+    The index is stored in the cache and only rebuilt when the modification
+    time of the versions folder changes, which happens whenever a version is
+    installed or removed. Jar files already in the index are not read again.
+
+    :param mc_dir: The Minecraft installation directory (.minecraft)
+    :return: A dictionary with the path, size, mtime and data version of
+        every Jar file, by version name. The data version is None for
+        unsupported versions (e.g. snapshots).
+    """
+    if not mc_dir:
+        mc_dir = MC_FOLDER
+    installations_folder = os.path.abspath(f"{mc_dir}/versions")
+    index_name = "versions_" + hl.sha1(
+        installations_folder.encode("utf-8")).hexdigest()
+    folder_mtime = os.stat(installations_folder).st_mtime_ns
+    index = cache_utils.load_index(index_name) or {}
+    if index.get("mtime_ns") == folder_mtime:
+        logging.info("Using the index of installed minecraft versions")
+        return index["versions"]
+
+    logging.info("Looking for installed minecraft versions")
+    versions = dict()
+    previous_versions = index.get("versions", {})
+    for i in os.listdir(installations_folder):
+        version_jar = f"{installations_folder}/{i}/{i}.jar"
+        try:
+            stat = os.stat(version_jar)
+        except OSError:
+            continue
+        previous = previous_versions.get(i)
+        if previous and previous["jar"] == version_jar \
+                and previous["size"] == stat.st_size \
+                and previous["mtime_ns"] == stat.st_mtime_ns:
+            versions[i] = previous
+            continue
+        versions[i] = {
+            "jar": version_jar,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "data_version": mu.version_map.get(i) or _read_data_version(
+                version_jar)
+        }
+    cache_utils.store_index(index_name, {
+        "mtime_ns": folder_mtime,
+        "versions": versions
+    })
+    return versions
+
+
+def _read_data_version(version_jar: str) -> Optional[str]:
+    """ Read the data version of a release from its Jar file.
+
+    :param version_jar: The path to the Minecraft client Jar.
+    :return: The data version or None if it is not a release or the Jar does
+        not contain a version.json file (before 1.14).
+    """
+    try:
+        with ZipFile(version_jar) as jar:
+            version_info = json.loads(jar.read("version.json"))
+    except (OSError, KeyError, ValueError, BadZipFile):
+        logging.info(f"No data version found in '{version_jar}'")
+        return None
+    if not version_info.get("stable") or "world_version" not in version_info:
+        return None
+    return str(version_info["world_version"])
+
+
+def get_data_version(version: str) -> Optional[str]:
+    """ Get the data version of a Minecraft release.
+
+    :param version: The version name (e.g. '1.15.2').
+    :return: The data version of the release or None if it is unknown.
+    """
+    if version in mu.version_map:
+        return mu.version_map[version]
+    try:
+        entry = get_installed_version_index(MC_FOLDER).get(version)
+    except OSError:
+        return None  # Minecraft is not installed
+    return entry and entry["data_version"]
+
+
 def change_directory(to_dir: str) -> str:
     """ Change to a different directory. Returns current directory.
 
@@ -156,22 +238,61 @@ def change_directory(to_dir: str) -> str:
     return owd
 
 
-def get_available_datapacks() -> List[
-        Union[rl.RandomLootDataPack, ed.ExternalDatapack]]:
+def get_available_datapacks(max_workers: int = None) -> List[Datapack]:
     """ Get a list of the datapacks that can be added to a world.
 
     Reads the zip files available in the assets/datapacks folder and
-    creates an ExternalDatapack object with their path and name. The external
-    datapacks are then appended after a RandomLootDatapack object, which is
-    built during program runtime.
+    creates an ExternalDatapack object with their path, name, description and
+    pack format. The external datapacks are then appended after the
+    randomizer datapacks, which are built from the client jar during program
+    runtime.
+
+    The metadata of the zips is kept in an index in the cache, so only the
+    zips that are new or changed since the last call are read. They are read
+    on a pool of threads, as the folder may be on network storage.
 
-    :return: A list of the available datapacks.
+    :param max_workers: The maximum amount of zips read at the same time.
+        Defaults to the thread pool default.
+    :return: A list of the available datapacks, sorted by file name.
     """
-    datapacks = [rl.RandomLootDataPack()]
+    # Imported when used, as the datapacks depend on this module
+    from fast_world_creator.datapacks import external_datapack as ed, \
+        random_advancements as ra, random_loot as rl, random_recipes as rr
     external_datapack_folder = f"{os.getcwd()}/assets/datapacks"
-    for z in os.listdir(external_datapack_folder):
-        if z.endswith(".zip"):
-            dp = ed.ExternalDatapack(f"{external_datapack_folder}/{z}")
-            datapacks.append(dp)
+    index_name = "datapacks_" + hl.sha1(
+        external_datapack_folder.encode("utf-8")).hexdigest()
+    index = cache_utils.load_index(index_name) or {}
+
+    files = {}
+    changed = []
+    for entry in os.scandir(external_datapack_folder):
+        if not entry.name.endswith(".zip") or not entry.is_file():
+            continue
+        stat = entry.stat()
+        previous = index.get(entry.name)
+        if previous and previous["size"] == stat.st_size \
+                and previous["mtime_ns"] == stat.st_mtime_ns:
+            files[entry.name] = previous
+        else:
+            files[entry.name] = {"size": stat.st_size,
+                                 "mtime_ns": stat.st_mtime_ns}
+            changed.append(entry.name)
+
+    if changed:
+        logging.info(f"Reading the metadata of {len(changed)} datapack(s)")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for name, metadata in zip(changed, executor.map(
+                    ed.read_pack_metadata,
+                    [f"{external_datapack_folder}/{z}" for z in changed])):
+                files[name].update(metadata)
+    if changed or len(files) != len(index):
+        cache_utils.store_index(index_name, files)
+
+    datapacks = [rl.RandomLootDataPack(), rr.RandomRecipesDataPack(),
+                 ra.RandomAdvancementsDataPack()]
+    for z in sorted(files):
+        datapacks.append(ed.ExternalDatapack(
+            f"{external_datapack_folder}/{z}", files[z]["description"],
+            files[z]["pack_format"]))
     logging.info(f"Found {len(datapacks)} available datapacks")
     return datapacks
@@ -0,0 +1,269 @@
+import collections
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED
+
+from fast_world_creator.utils import cache_utils
+from fast_world_creator.utils import zip_utils as zu
+
+# Version of the stored index format, part of the index name
+JAR_INDEX_VERSION = 1
+# Position of every field in the stored entries
+NAME, DATA_OFFSET, COMPRESS_SIZE, FILE_SIZE, COMPRESS_TYPE, CRC, FLAG_BITS, \
+    DATE_TIME, EXTERNAL_ATTR = range(9)
+# zlib releases the GIL, so entries are decompressed on a pool of threads
+DECOMPRESS_WORKERS = 4
+# Decompressed bytes of the files read by every task of JarReader.read_many
+DECOMPRESS_BATCH_BYTES = 256 * 1024
+# Maximum decompressed bytes read ahead of the consumer of JarReader.read_many
+MAX_IN_FLIGHT_BYTES = 64 * 1024 * 1024
+
+_jar_indexes: Dict[str, "JarIndex"] = {}
+# Lookups of the indexes stored in the cache folder, like artifact_stats
+jar_index_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+_jar_indexes_lock = threading.Lock()
+
+
+class JarIndex:
+    """ The central directory of a jar, with the data offset of every entry.
+
+    The index is built once per jar and stored in the cache, so the central
+    directory of the jar, which has thousands of entries, does not have to be
+    parsed again. The entries are read through a JarReader, which seeks
+    straight to their compressed data.
+    """
+
+    def __init__(self, jar_path: str, entries: List[Sequence]):
+        """
+        :param jar_path: The path to the jar file.
+        :param entries: The entries in the order they are stored in the jar,
+            as sequences of the NAME ... EXTERNAL_ATTR fields.
+        """
+        self.jar_path = jar_path
+        self.entries = {e[NAME]: e for e in entries}
+        # Cache key of the jar, set by get_jar_index
+        self.key = None
+        self._names_by_prefix: Dict[str, List[str]] = {}
+
+    @classmethod
+    def build(cls, jar_path: str) -> "JarIndex":
+        """ Parse the central directory of a jar and locate every entry.
+
+        :param jar_path: The path to the jar file.
+        :return: The index of every file in the jar.
+        """
+        logging.info(f"Indexing the entries of '{jar_path}'")
+        entries = []
+        with ZipFile(jar_path) as jar, open(jar_path, "rb") as jar_fp, \
+                mmap.mmap(jar_fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for info in jar.infolist():
+                if info.is_dir():
+                    continue
+                if mm[info.header_offset:info.header_offset + 4] \
+                        != zu.LOCAL_HEADER_SIGNATURE:
+                    raise ValueError(
+                        f"Bad local file header for '{info.filename}'")
+                name_length, extra_length = struct.unpack_from(
+                    "<HH", mm, info.header_offset + 26)
+                entries.append((
+                    info.filename,
+                    info.header_offset + zu.LOCAL_HEADER_SIZE + name_length
+                    + extra_length,
+                    info.compress_size, info.file_size, info.compress_type,
+                    info.CRC, info.flag_bits, info.date_time,
+                    info.external_attr
+                ))
+        return cls(jar_path, entries)
+
+    def get_names(self, prefix: str) -> List[str]:
+        """ Get the files under a path prefix, in the order they are stored.
+
+        :param prefix: The path prefix (e.g. 'data/minecraft/loot_tables').
+        :return: The paths of the files in the jar.
+        """
+        if prefix not in self._names_by_prefix:
+            self._names_by_prefix[prefix] = [
+                name for name in self.entries if name.startswith(prefix)]
+        return self._names_by_prefix[prefix]
+
+    def get_info(self, name: str) -> ZipInfo:
+        """ Get the zip entry of a file, as read from the central directory.
+
+        :param name: The path of the file in the jar.
+        :return: The entry, with its size, CRC and compression method.
+        """
+        entry = self.entries[name]
+        info = ZipInfo(name, date_time=entry[DATE_TIME])
+        info.compress_size = entry[COMPRESS_SIZE]
+        info.file_size = entry[FILE_SIZE]
+        info.compress_type = entry[COMPRESS_TYPE]
+        info.CRC = entry[CRC]
+        info.flag_bits = entry[FLAG_BITS]
+        info.external_attr = entry[EXTERNAL_ATTR]
+        return info
+
+    def open(self) -> "JarReader":
+        """ Open the jar to read the indexed entries. """
+        return JarReader(self)
+
+
+class JarReader:
+    """ Reads the entries of an indexed jar through a memory map.
+
+    Used as a context manager. Reading is thread safe, and the jar is only
+    kept open while the reader is, so it can still be updated or removed by
+    the launcher.
+    """
+
+    def __init__(self, index: JarIndex):
+        self.index = index
+        self._file = open(index.jar_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self) -> "JarReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+    def read_raw(self, name: str) -> bytes:
+        """ Read the compressed data of a file, exactly as stored in the jar.
+
+        :param name: The path of the file in the jar.
+        :return: The compressed bytes.
+        """
+        entry = self.index.entries[name]
+        start = entry[DATA_OFFSET]
+        return self._mmap[start:start + entry[COMPRESS_SIZE]]
+
+    def read(self, name: str) -> bytes:
+        """ Read the contents of a file.
+
+        :param name: The path of the file in the jar.
+        :return: The decompressed bytes.
+        """
+        entry = self.index.entries[name]
+        if entry[FLAG_BITS] & 0x1 or entry[COMPRESS_TYPE] not in (
+                ZIP_STORED, ZIP_DEFLATED):
+            # Encrypted or uncommon compression, leave it to zipfile
+            with ZipFile(self.index.jar_path) as jar:
+                return jar.read(name)
+        data = self.read_raw(name)
+        if entry[COMPRESS_TYPE] == ZIP_DEFLATED:
+            data = zlib.decompress(data, -zlib.MAX_WBITS)
+        if zlib.crc32(data) != entry[CRC]:
+            raise ValueError(f"Bad CRC-32 for '{name}' in "
+                             f"'{self.index.jar_path}'")
+        return data
+
+    def read_many(self, names: Iterable[str], max_workers: int = None,
+                  max_in_flight_bytes: int = None) \
+            -> Iterator[Tuple[str, bytes]]:
+        """ Read the contents of several files, decompressing them in parallel.
+
+        The files are returned in the same order as the names, whichever
+        finishes first. They are decompressed in batches of about
+        DECOMPRESS_BATCH_BYTES, as most files in a jar are too small to be
+        worth a task of their own. Batches are only read ahead while the
+        decompressed size of the files that were not returned yet stays under
+        the byte budget. The budget does not cover the files once returned,
+        so memory only stays bounded if the caller handles every file and
+        drops it before asking for the next one, as read_jar_entries and
+        JarDatapack.store do.
+
+        :param names: The paths of the files in the jar.
+        :param max_workers: The maximum amount of batches decompressed at the
+            same time. Defaults to DECOMPRESS_WORKERS, or 1 on single core
+            systems, where the files are read without a pool.
+        :param max_in_flight_bytes: The maximum decompressed bytes read ahead.
+            Defaults to MAX_IN_FLIGHT_BYTES.
+        :return: Pairs of (path, contents).
+        """
+        workers = max_workers or min(DECOMPRESS_WORKERS, os.cpu_count() or 1)
+        if workers == 1:
+            for name in names:
+                yield name, self.read(name)
+            return
+        budget = max_in_flight_bytes or MAX_IN_FLIGHT_BYTES
+        pending = collections.deque()
+        in_flight = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for batch, size in self._get_batches(names, budget):
+                    while pending and in_flight + size > budget:
+                        done_size, future = pending.popleft()
+                        in_flight -= done_size
+                        yield from future.result()
+                    pending.append(
+                        (size, executor.submit(self._read_batch, batch)))
+                    in_flight += size
+                while pending:
+                    yield from pending.popleft()[1].result()
+            finally:
+                # The consumer stopped early or a file could not be read
+                for _, future in pending:
+                    future.cancel()
+
+    def _read_batch(self, names: List[str]) -> List[Tuple[str, bytes]]:
+        return [(name, self.read(name)) for name in names]
+
+    def _get_batches(self, names: Iterable[str], budget: int) \
+            -> Iterator[Tuple[List[str], int]]:
+        """ Split files into batches of about DECOMPRESS_BATCH_BYTES.
+
+        :return: Pairs of (paths, decompressed size) of every batch.
+        """
+        batch_bytes = min(DECOMPRESS_BATCH_BYTES, budget)
+        batch, size = [], 0
+        for name in names:
+            batch.append(name)
+            size += self.index.entries[name][FILE_SIZE]
+            if size >= batch_bytes:
+                yield batch, size
+                batch, size = [], 0
+        if batch:
+            yield batch, size
+
+
+def get_jar_index(jar_path: str) -> JarIndex:
+    """ Get the index of a jar, building it if it is not cached.
+
+    The index is kept in memory and in the cache folder, keyed by the jar
+    path, size and mtime, so it is rebuilt whenever the jar changes.
+
+    :param jar_path: The path to the jar file.
+    :return: The index of the jar.
+    """
+    key = cache_utils.get_file_key(jar_path, str(JAR_INDEX_VERSION))
+    with _jar_indexes_lock:
+        if key in _jar_indexes:
+            return _jar_indexes[key]
+        # Jars have thousands of entries, so the faster binary format is used
+        stored = cache_utils.load_index(f"jar_{key}", binary=True)
+        if stored:
+            jar_index_stats["hits"] += 1
+            logging.info(f"Jar index hit for '{jar_path}' "
+                         f"(hits: {jar_index_stats['hits']}, "
+                         f"misses: {jar_index_stats['misses']})")
+            index = JarIndex(jar_path, stored)
+        else:
+            jar_index_stats["misses"] += 1
+            logging.info(f"Jar index miss for '{jar_path}' "
+                         f"(hits: {jar_index_stats['hits']}, "
+                         f"misses: {jar_index_stats['misses']})")
+            index = JarIndex.build(jar_path)
+            cache_utils.store_index(f"jar_{key}", list(index.entries.values()),
+                                    binary=True)
+        index.key = key
+        _jar_indexes[key] = index
+        return index
@@ -91,3 +91,52 @@ def get_default_gamerules() -> dict:
         'spawnRadius': 10,
         'spectatorsGenerateChunks': True,
     }
+
+
+def get_default_border_settings() -> dict:
+    """ Get a dictionary containing each world border option and its default.
+
+    The keys match the options accepted by the core execution, which are the
+    same ones produced by the border tab of the UI.
+    :return: The default world border options.
+    """
+    return {
+        'x': 0,
+        'z': 0,
+        'damage': 0.2,
+        'safe_blocks': 5,
+        'warn_time': 15,
+        'warn_blocks': 5,
+        'size': 60000000,
+        'size_target': 60000000,
+        'lerp_time': 0,
+    }
+
+
+# level.dat entry of every world border option, and how its value is stored
+BORDER_LEVEL_DATA = {
+    'x': ('BorderCenterX', float),
+    'z': ('BorderCenterZ', float),
+    'damage': ('BorderDamagePerBlock', float),
+    'safe_blocks': ('BorderSafeZone', float),
+    'size': ('BorderSize', float),
+    'size_target': ('BorderSizeLerpTarget', float),
+    'lerp_time': ('BorderSizeLerpTime', lambda v: int(float(v) * 600)),
+    'warn_blocks': ('BorderWarningBlocks', float),
+    'warn_time': ('BorderWarningTime', float),
+}
+
+
+def get_border_level_data(border_settings: dict) -> dict:
+    """ Convert world border options into level.dat entries.
+
+    :param border_settings: World border options, as returned by
+        get_default_border_settings. Options that are missing are left out,
+        and unknown options are ignored.
+    :return: The level.dat entries of the options.
+    """
+    return {
+        key: convert(border_settings[option])
+        for option, (key, convert) in BORDER_LEVEL_DATA.items()
+        if option in border_settings
+    }
@@ -0,0 +1,131 @@
+import json
+import logging
+import re
+from typing import Dict, List, Tuple
+from zipfile import ZipFile, ZIP_DEFLATED
+
+from fast_world_creator.utils import zip_utils as zu
+
+MERGED_DATAPACK_NAME = "merged_datapacks"
+MERGE_REPORT_NAME = "merge_report.json"
+# Tags are merged by the game instead of overridden, so the merge does too
+TAG_PATTERN = re.compile(r"^data/[^/]+/tags/.+\.json$")
+
+
+def merge_datapacks(datapacks: List[Tuple[str, str]], merged_path: str,
+                    report_path: str = None) -> dict:
+    """ Merge several datapack zips into a single one.
+
+    Files are resolved the same way the game resolves them between enabled
+    datapacks: a file in a later datapack overrides the same file in the
+    earlier ones, except for tags, whose values are joined unless a later tag
+    replaces them. Files that are not merged are copied without being
+    decompressed.
+
+    :param datapacks: Pairs of (name, zip path) of the datapacks, in the order
+        they would be enabled.
+    :param merged_path: The path of the merged zip to create.
+    :param report_path: An optional path to store the conflict report in, as
+        JSON.
+    :return: The conflict report, with the datapacks merged, the files
+        overridden, the tags merged and the datapacks whose tags replace the
+        tags of the game, by path.
+    """
+    logging.info(f"Merging {len(datapacks)} datapack(s) into '{merged_path}'")
+    zips = [ZipFile(path) for _, path in datapacks]
+    fps = [open(path, "rb") for _, path in datapacks]
+    try:
+        # Indexes of the datapacks containing every file, in datapack order
+        owners: Dict[str, List[int]] = {}
+        for i, zip_file in enumerate(zips):
+            for info in zip_file.infolist():
+                if not info.is_dir() and info.filename != "pack.mcmeta":
+                    owners.setdefault(info.filename, []).append(i)
+
+        report = {
+            "datapacks": [name for name, _ in datapacks],
+            "overridden": {},
+            "merged_tags": {},
+            "replaced_tags": {}
+        }
+        with ZipFile(merged_path, "w", ZIP_DEFLATED, False) as merged:
+            merged.writestr("pack.mcmeta", json.dumps(
+                _merge_pack_mcmeta(datapacks, zips), indent=4))
+            for path, indexes in owners.items():
+                names = [datapacks[i][0] for i in indexes]
+                if len(indexes) > 1 and TAG_PATTERN.match(path):
+                    tag, replacing = _merge_tags(
+                        [zips[i].read(path) for i in indexes])
+                    merged.writestr(path, json.dumps(tag))
+                    report["merged_tags"][path] = names
+                    if replacing:
+                        report["replaced_tags"][path] = [
+                            names[i] for i in replacing]
+                    continue
+                if len(indexes) > 1:
+                    report["overridden"][path] = {
+                        "winner": names[-1],
+                        "overridden": names[:-1]
+                    }
+                winner = indexes[-1]
+                zu.copy_entry(zips[winner], fps[winner],
+                              zips[winner].getinfo(path), merged, path)
+    finally:
+        for f in [*zips, *fps]:
+            f.close()
+    logging.info(f"Merged {len(owners)} files, {len(report['overridden'])} "
+                 f"overridden and {len(report['merged_tags'])} tags merged")
+    if report_path:
+        with open(report_path, "w") as report_file:
+            json.dump(report, report_file, indent=4)
+    return report
+
+
+def _merge_pack_mcmeta(datapacks: List[Tuple[str, str]],
+                       zips: List[ZipFile]) -> dict:
+    """ Create the pack.mcmeta of the merged datapack.
+
+    Uses the highest pack format among the datapacks, as the merged datapack
+    is only as compatible as its newest part.
+    """
+    pack_formats = []
+    for zip_file in zips:
+        try:
+            pack = json.loads(zip_file.read("pack.mcmeta"))["pack"]
+            pack_formats.append(int(pack["pack_format"]))
+        except (KeyError, ValueError, TypeError):
+            continue
+    return {
+        "pack": {
+            "pack_format": max(pack_formats, default=5),
+            "description": "Merged datapacks: " + ", ".join(
+                name for name, _ in datapacks)
+        }
+    }
+
+
+def _merge_tags(tags: List[bytes]) -> Tuple[dict, List[int]]:
+    """ Join the values of the same tag in several datapacks.
+
+    :param tags: The contents of the tag files, in datapack order.
+    :return: The merged tag and the indexes of the tags that replace the
+        values of the tag before them. The merged tag replaces the tag of the
+        game if any of them does.
+    """
+    values = []
+    replacing = []
+    for i, data in enumerate(tags):
+        try:
+            tag = json.loads(data)
+        except ValueError:
+            tag = None
+        if not isinstance(tag, dict):
+            logging.warning("Ignoring invalid tag while merging")
+            continue
+        if tag.get("replace", False):
+            values = list()
+            replacing.append(i)
+        for value in tag.get("values", []):
+            if value not in values:
+                values.append(value)
+    return {"replace": bool(replacing), "values": values}, replacing
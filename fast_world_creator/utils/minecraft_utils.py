@@ -1,6 +1,7 @@
 import enum
 import logging
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Tuple
 
 
 class Difficulties(enum.IntEnum):
@@ -44,13 +45,36 @@ buffet_chunk_gen = ["Surface", "Caves", "Floating_islands", "Flat", "Debug"]
 def get_mc_definitions(resource: str) -> List[str]:
     """ Load Minecraft values from the assets folder.
 
+    The file is only read the first time a resource is requested.
+
     :param resource: The resource to load from disk.
     :return: The lines of the file assets/minecraft_definitions/<resource>,
         without the line breaks.
     """
+    return list(_read_mc_definitions(resource))
+
+
+@lru_cache(maxsize=None)
+def _read_mc_definitions(resource: str) -> Tuple[str, ...]:
     logging.info(f"Loading definitions for '{resource}'")
     with open(f"assets/minecraft_definitions/{resource}.txt", "r") as f:
-        return [line.rstrip("\n") for line in f.readlines() if line]
+        return tuple(line.rstrip("\n") for line in f.readlines() if line)
+
+
+def parse_flat_layers(layers: str) -> List[tuple]:
+    """ Split a superflat layer string into (height, block) pairs.
+
+    :param layers: The comma separated layers, from bottom to top, as written
+        in the superflat presets (e.g. 'bedrock,2*dirt,grass_block').
+    :return: The height and block name of every layer.
+    """
+    parsed = []
+    for layer in layers.split(","):
+        if "*" in layer:
+            parsed.append(tuple(layer.split("*")))
+        else:
+            parsed.append((1, layer))
+    return parsed
 
 
 # Mapping between a release name and its data version.
@@ -68,3 +92,35 @@ version_map: Dict[str, str] = {
     "1.13.1": "1628",
     "1.13": "1519",
 }
+
+# Numeric ids of the biomes, stored in the chunks of 1.13 to 1.17 worlds.
+# For more information, visit https://minecraft.gamepedia.com/Biome/ID.
+biome_ids: Dict[str, int] = {
+    "ocean": 0, "plains": 1, "desert": 2, "mountains": 3, "forest": 4,
+    "taiga": 5, "swamp": 6, "river": 7, "nether": 8, "nether_wastes": 8,
+    "the_end": 9, "frozen_ocean": 10, "frozen_river": 11, "snowy_tundra": 12,
+    "snowy_mountains": 13, "mushroom_fields": 14, "mushroom_field_shore": 15,
+    "beach": 16, "desert_hills": 17, "wooded_hills": 18, "taiga_hills": 19,
+    "mountain_edge": 20, "jungle": 21, "jungle_hills": 22, "jungle_edge": 23,
+    "deep_ocean": 24, "stone_shore": 25, "snowy_beach": 26,
+    "birch_forest": 27, "birch_forest_hills": 28, "dark_forest": 29,
+    "snowy_taiga": 30, "snowy_taiga_hills": 31, "giant_tree_taiga": 32,
+    "giant_tree_taiga_hills": 33, "wooded_mountains": 34, "savanna": 35,
+    "savanna_plateau": 36, "badlands": 37, "wooded_badlands_plateau": 38,
+    "badlands_plateau": 39, "small_end_islands": 40, "end_midlands": 41,
+    "end_highlands": 42, "end_barrens": 43, "warm_ocean": 44,
+    "lukewarm_ocean": 45, "cold_ocean": 46, "deep_warm_ocean": 47,
+    "deep_lukewarm_ocean": 48, "deep_cold_ocean": 49, "deep_frozen_ocean": 50,
+    "the_void": 127, "sunflower_plains": 129, "desert_lakes": 130,
+    "gravelly_mountains": 131, "flower_forest": 132, "taiga_mountains": 133,
+    "swamp_hills": 134, "ice_spikes": 140, "modified_jungle": 149,
+    "modified_jungle_edge": 151, "tall_birch_forest": 155,
+    "tall_birch_hills": 156, "dark_forest_hills": 157,
+    "snowy_taiga_mountains": 158, "giant_spruce_taiga": 160,
+    "giant_spruce_taiga_hills": 161, "modified_gravelly_mountains": 162,
+    "shattered_savanna": 163, "shattered_savanna_plateau": 164,
+    "eroded_badlands": 165, "modified_wooded_badlands_plateau": 166,
+    "modified_badlands_plateau": 167, "bamboo_jungle": 168,
+    "bamboo_jungle_hills": 169, "soul_sand_valley": 170,
+    "crimson_forest": 171, "warped_forest": 172, "basalt_deltas": 173,
+}
@@ -0,0 +1,112 @@
+import hashlib as hl
+import json
+import logging
+import os
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED
+
+from fast_world_creator.utils import cache_utils
+
+# Part of the artifact key, so changes to the minification invalidate the
+# minified zips in the artifact store
+MINIFY_VERSION = 1
+JSON_EXTENSIONS = (".json", ".mcmeta")
+FUNCTION_EXTENSION = ".mcfunction"
+
+
+def minify_json(data: bytes) -> bytes:
+    """ Serialize a JSON file without whitespace.
+
+    :param data: The contents of the file.
+    :return: The compact contents, or the same contents if it is not valid
+        JSON, which Minecraft reports when loading the datapack.
+    """
+    try:
+        value = json.loads(data)
+    except ValueError:
+        return data
+    return json.dumps(value, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def minify_function(data: bytes) -> bytes:
+    """ Remove comments, indentation and blank lines from a function file.
+
+    :param data: The contents of the .mcfunction file.
+    :return: The commands of the function, one per line.
+    """
+    try:
+        lines = data.decode("utf-8").splitlines()
+    except UnicodeDecodeError:
+        return data
+    commands = [line.strip() for line in lines]
+    return "\n".join(
+        c for c in commands if c and not c.startswith("#")).encode("utf-8")
+
+
+def minify_file(path: str, data: bytes) -> bytes:
+    """ Minify a datapack file according to its extension.
+
+    :param path: The path of the file in the datapack.
+    :param data: The contents of the file.
+    :return: The minified contents, or the same contents for other files.
+    """
+    if path.endswith(JSON_EXTENSIONS):
+        return minify_json(data)
+    if path.endswith(FUNCTION_EXTENSION):
+        return minify_function(data)
+    return data
+
+
+def minify_zip(src_path: str, dst_path: str, compresslevel: int = None) \
+        -> None:
+    """ Write a minified copy of a datapack zip.
+
+    Every file is minified and compressed again, keeping its path and date.
+
+    :param src_path: The path to the datapack zip.
+    :param dst_path: The path of the minified zip to create.
+    :param compresslevel: The zlib compression level, from 0 to 9. Defaults
+        to the zlib default.
+    """
+    with ZipFile(src_path) as src, \
+            ZipFile(dst_path, "w", ZIP_DEFLATED, False,
+                    compresslevel=compresslevel) as dst:
+        for info in src.infolist():
+            if info.is_dir():
+                continue
+            minified_info = ZipInfo(info.filename, date_time=info.date_time)
+            minified_info.external_attr = info.external_attr
+            dst.writestr(minified_info,
+                         minify_file(info.filename, src.read(info)),
+                         compress_type=ZIP_DEFLATED,
+                         compresslevel=compresslevel)
+
+
+def minify_datapack(zip_path: str, compresslevel: int = None) -> int:
+    """ Replace a datapack zip with its minified version.
+
+    The minified zips are kept in the artifact store by the digest of the
+    original, so every datapack is only minified once. The original zip is
+    replaced, never written, as it may be a link to a stored artifact.
+
+    :param zip_path: The path to the datapack zip.
+    :param compresslevel: The zlib compression level, from 0 to 9. Defaults
+        to the zlib default.
+    :return: The bytes saved, negative if the minified zip is larger.
+    """
+    size = os.path.getsize(zip_path)
+    key = "|".join(["minify", str(MINIFY_VERSION),
+                    cache_utils.get_file_digest(zip_path), str(compresslevel)])
+    key = hl.sha1(key.encode("utf-8")).hexdigest()
+    tmp_path = f"{zip_path}.minify.tmp"
+    artifact_path = cache_utils.get_artifact(key)
+    if artifact_path:
+        cache_utils.link_file(artifact_path, tmp_path)
+        os.replace(tmp_path, zip_path)
+    else:
+        minify_zip(zip_path, tmp_path, compresslevel)
+        os.replace(tmp_path, zip_path)
+        cache_utils.store_artifact(zip_path, key)
+    saved = size - os.path.getsize(zip_path)
+    logging.info(f"Minified '{zip_path}', {saved} bytes saved")
+    return saved
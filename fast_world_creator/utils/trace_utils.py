@@ -0,0 +1,97 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Tuple
+from zipfile import BadZipFile
+
+from fast_world_creator.utils import zip_utils as zu
+
+
+class Span:
+    """ A timed stage of the world creation.
+
+    Used as a context manager around the stage. Stages that write files report
+    the amount of bytes written and entries (e.g. the entries of a zip)
+    through the args dictionary.
+    """
+
+    def __init__(self, name: str, category: str = "world", **args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+        self.end = None
+        self.thread_id = threading.get_ident()
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        self.end = time.perf_counter()
+        if exc_type:
+            self.args["error"] = f"{exc_type.__name__}: {exc_val}"
+        logging.debug(f"Stage '{self.name}' took {self.duration * 1000:.3f}ms")
+        return False
+
+    @property
+    def duration(self) -> float:
+        """ The duration of the stage in seconds. """
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_trace_event(self, pid: int = None) -> dict:
+        """ Convert the span into a Chrome trace event.
+
+        The timestamps come from the monotonic clock, which is shared by every
+        process of the system, so spans of different processes line up.
+
+        :param pid: The process the span belongs to. Defaults to the current.
+        :return: A complete ('X') event, with timestamps in microseconds.
+        """
+        return {
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": self.start * 1e6,
+            "dur": self.duration * 1e6,
+            "pid": pid if pid is not None else os.getpid(),
+            "tid": self.thread_id,
+            "args": self.args
+        }
+
+
+def get_zip_stats(path: str) -> Tuple[int, int]:
+    """ Get the size and the amount of entries of a zip file.
+
+    :param path: The path to the zip file.
+    :return: The size in bytes and the amount of entries. The amount of
+        entries is 0 if the file is not a valid zip.
+    """
+    try:
+        return os.path.getsize(path), zu.get_entry_count(path)
+    except BadZipFile:
+        return os.path.getsize(path), 0
+
+
+def to_chrome_trace(events: Iterable[dict]) -> dict:
+    """ Wrap trace events into the Chrome trace-event format.
+
+    The result can be opened in chrome://tracing or https://ui.perfetto.dev.
+
+    :param events: The events, as created by Span.to_trace_event.
+    :return: The JSON object of the trace.
+    """
+    return {"traceEvents": list(events), "displayTimeUnit": "ms"}
+
+
+def save_chrome_trace(events: Iterable[dict], path: str) -> None:
+    """ Store trace events as a Chrome trace-event JSON file.
+
+    :param events: The events, as created by Span.to_trace_event.
+    :param path: The path to the JSON file to create.
+    """
+    logging.info(f"Storing trace in {path}")
+    with open(path, "w") as trace_file:
+        json.dump(to_chrome_trace(events), trace_file)
@@ -0,0 +1,187 @@
+import logging
+import shutil
+import struct
+import zlib
+from typing import BinaryIO, Iterable, Iterator
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED, ZIP64_LIMIT
+
+# Compression methods whose records can be copied between zips untouched
+RAW_COPY_COMPRESSION = (ZIP_STORED, ZIP_DEFLATED)
+LOCAL_HEADER_SIZE = 30
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+END_RECORD_SIZE = 22
+END_RECORD_SIGNATURE = b"PK\x05\x06"
+COPY_CHUNK_SIZE = 64 * 1024
+# Private ZipFile attributes used to write compressed records as they are.
+# Read from the zipfile module of CPython 3.7 to 3.12 and tested with 3.11.
+RAW_WRITE_ATTRIBUTES = ("fp", "filelist", "NameToInfo", "start_dir",
+                        "_seekable", "_writecheck", "_didModify", "_lock")
+
+
+def can_copy_raw(info: ZipInfo) -> bool:
+    """ Whether the compressed record of a zip entry can be copied as-is.
+
+    :param info: The entry of the source zip.
+    :return: True if the entry uses a common compression method and is not
+        encrypted.
+    """
+    return info.compress_type in RAW_COPY_COMPRESSION \
+        and not info.flag_bits & 0x1
+
+
+def get_data_offset(source_fp: BinaryIO, info: ZipInfo) -> int:
+    """ Find where the compressed data of a zip entry starts.
+
+    The local file header may have a different extra field than the central
+    directory, so its length has to be read from the local header itself.
+
+    :param source_fp: The source zip, opened in binary mode.
+    :param info: The entry of the source zip.
+    :return: The offset of the first byte of compressed data.
+    """
+    source_fp.seek(info.header_offset)
+    header = source_fp.read(LOCAL_HEADER_SIZE)
+    if header[:4] != LOCAL_HEADER_SIGNATURE:
+        raise ValueError(f"Bad local file header for '{info.filename}'")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    return info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length
+
+
+def supports_raw_write(target: ZipFile) -> bool:
+    """ Whether compressed records can be written into a zip as they are.
+
+    Writing a record without compressing it uses private attributes of
+    ZipFile, which are checked here so a different zipfile module makes the
+    callers fall back to the public API instead of writing a corrupt zip.
+
+    :param target: The zip being written.
+    :return: True if the zip has every attribute _write_raw_record uses.
+    """
+    return all(hasattr(target, a) for a in RAW_WRITE_ATTRIBUTES)
+
+
+def _write_raw_record(target: ZipFile, arcname: str, info: ZipInfo,
+                      chunks: Iterable[bytes]) -> None:
+    """ Add an entry to a zip from its compressed record.
+
+    The only function that writes the private attributes of ZipFile, and
+    only called when supports_raw_write is True. The local header is written
+    with the size, CRC and compression of the source entry, followed by the
+    compressed bytes, which must be exactly info.compress_size bytes. The
+    central directory is written by the target zip when it is closed.
+
+    :param target: The zip being written.
+    :param arcname: The name of the entry in the target zip.
+    :param info: The entry whose size, CRC and compression are reused.
+    :param chunks: The compressed bytes of the record.
+    """
+    zinfo = ZipInfo(arcname, date_time=info.date_time)
+    zinfo.compress_type = info.compress_type
+    zinfo.CRC = info.CRC
+    zinfo.compress_size = info.compress_size
+    zinfo.file_size = info.file_size
+    zinfo.external_attr = info.external_attr
+    zip64 = info.file_size > ZIP64_LIMIT or info.compress_size > ZIP64_LIMIT
+    with target._lock:
+        if target._seekable:
+            target.fp.seek(target.start_dir)
+        zinfo.header_offset = target.fp.tell()
+        target._writecheck(zinfo)
+        target._didModify = True
+        target.filelist.append(zinfo)
+        target.NameToInfo[zinfo.filename] = zinfo
+        target.fp.write(zinfo.FileHeader(zip64))
+        for chunk in chunks:
+            target.fp.write(chunk)
+        target.start_dir = target.fp.tell()
+
+
+def _write_decompressed(target: ZipFile, arcname: str, info: ZipInfo,
+                        data: bytes) -> None:
+    """ Add an entry to a zip with the public API, compressing it again. """
+    zinfo = ZipInfo(arcname, date_time=info.date_time)
+    zinfo.external_attr = info.external_attr
+    target.writestr(zinfo, data, compress_type=info.compress_type)
+
+
+def _read_record(source_fp: BinaryIO, info: ZipInfo) -> Iterator[bytes]:
+    """ Read the compressed record of a zip entry in chunks. """
+    remaining = info.compress_size
+    source_fp.seek(get_data_offset(source_fp, info))
+    while remaining > 0:
+        chunk = source_fp.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise EOFError(f"Truncated entry '{info.filename}'")
+        yield chunk
+        remaining -= len(chunk)
+
+
+def copy_entry(source: ZipFile, source_fp: BinaryIO, info: ZipInfo,
+               target: ZipFile, arcname: str) -> bool:
+    """ Copy a zip entry into another zip under a different name.
+
+    When possible, the compressed bytes and CRC are copied verbatim, so the
+    entry is neither decompressed nor compressed again. Otherwise the entry is
+    decompressed and compressed with the compression of the target zip.
+
+    :param source: The zip to copy from.
+    :param source_fp: An independent binary file object of the source zip.
+    :param info: The entry of the source zip.
+    :param target: The zip to copy to.
+    :param arcname: The name of the entry in the target zip.
+    :return: True if the compressed record was copied verbatim.
+    """
+    if not can_copy_raw(info):
+        logging.debug(f"Recompressing '{info.filename}' (method "
+                      f"{info.compress_type}, flags {info.flag_bits:#x})")
+        with source.open(info) as src, target.open(arcname, "w") as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        return False
+    if not supports_raw_write(target):
+        _write_decompressed(target, arcname, info, source.read(info))
+        return False
+    _write_raw_record(target, arcname, info, _read_record(source_fp, info))
+    return True
+
+
+def write_raw_entry(target: ZipFile, arcname: str, info: ZipInfo,
+                    raw: bytes) -> None:
+    """ Write an already compressed record into a zip.
+
+    If the zip does not support raw writes, the record is decompressed and
+    written with the public API instead.
+
+    :param target: The zip being written.
+    :param arcname: The name of the entry in the target zip.
+    :param info: The source entry, which provides the CRC, sizes and
+        compression method of the record.
+    :param raw: The compressed bytes, exactly as stored in the source zip.
+    """
+    if supports_raw_write(target):
+        _write_raw_record(target, arcname, info, [raw])
+    elif info.compress_type == ZIP_DEFLATED:
+        _write_decompressed(target, arcname, info,
+                            zlib.decompressobj(-zlib.MAX_WBITS).decompress(raw))
+    else:
+        _write_decompressed(target, arcname, info, raw)
+
+
+def get_entry_count(path: str) -> int:
+    """ Count the entries of a zip file without reading its directory.
+
+    The count is read from the end of central directory record. Zips with a
+    comment or too many entries for that record are opened to count them.
+
+    :param path: The path to the zip file.
+    :return: The amount of entries in the zip.
+    """
+    with open(path, "rb") as zip_fp:
+        zip_fp.seek(0, 2)
+        if zip_fp.tell() >= END_RECORD_SIZE:
+            zip_fp.seek(-END_RECORD_SIZE, 2)
+            record = zip_fp.read(END_RECORD_SIZE)
+            count = struct.unpack("<H", record[10:12])[0]
+            if record[:4] == END_RECORD_SIGNATURE and count != 0xFFFF:
+                return count
+    with ZipFile(path) as zip_file:
+        return len(zip_file.infolist())